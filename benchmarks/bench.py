@@ -0,0 +1,365 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# The view benchmarks run without a window
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.append(SRC_DIR)
+
+from models import Board
+from levels import BitmapLevel
+
+CLASSIC_CONFIG = os.path.join(os.path.dirname(SRC_DIR), 'config', 'config.json')
+
+# name: (width, height, snake length, obstacle density)
+SCENARIOS = {
+    'classic': None, # The shipped config/config.json
+    'medium': (200, 200, 1_000, 0.0),
+    'dense': (200, 200, 1_000, 0.3),
+    'long': (500, 500, 100_000, 0.0),
+    'huge': (2000, 2000, 100_000, 0.05),
+}
+QUICK_SCENARIOS = ['classic', 'medium', 'dense']
+
+BATCH = 1000 # Operations per timed batch for the micro benchmarks
+ROUNDS = 7 # Batches per benchmark, the fastest is reported (least disturbed by other processes)
+DEFAULT_THRESHOLD = 0.25 # Slowdown (as a fraction) that counts as a regression
+
+
+def snake_path(width, length):
+    """Boustrophedon path of `length` cells starting at (0, 0), filling rows from the top."""
+    path = []
+    for i in range(length):
+        y, x = divmod(i, width)
+        path.append((x if y % 2 == 0 else width - 1 - x, y))
+    return path
+
+
+def write_config(directory, name, width, height, length, density, rng):
+    """Writes a generated level and returns its path and the snake body to lay out on it."""
+    path = snake_path(width, length)
+    head_x, head_y = path[-1]
+
+    # Keep the snake and a corridor below its head clear, so it has room to move
+    reserved = set(path) | {(head_x, y) for y in range(head_y, height)}
+    obstacles = []
+    if density:
+        count = int(width * height * density)
+        while len(obstacles) < count:
+            cell = (rng.randrange(width), rng.randrange(height))
+            if cell not in reserved:
+                reserved.add(cell)
+                obstacles.append(list(cell))
+
+    config = {
+        'board_size': {'width': width, 'height': height},
+        'cell_size': max(1, 900 // max(width, height)),
+        'initial_snake_position': [head_x, head_y],
+        'initial_obstacles': obstacles,
+    }
+    config_path = os.path.join(directory, f'{name}.json')
+    with open(config_path, 'w') as f:
+        json.dump(config, f)
+    return config_path, list(reversed(path))
+
+
+class Scenario:
+    """A board laid out for benchmarking: a snake of the requested length heading down a free corridor."""
+    def __init__(self, name, config_path, level_path, body):
+        self.name = name
+        self.config_path = config_path
+        self.level_path = level_path # Same level in the binary format
+        self.board = Board(config_path, seed=0)
+        self.rng = random.Random(0)
+
+        snake = self.board.snake
+        for cell in body[1:]:
+            snake.extend_tail(cell)
+        snake.direction = snake.next_direction = (0, 1)
+        self.board.food = self.board.spawn_food()
+
+        head_x, head_y = snake.body[0]
+        self.corridor = self.board.height - 1 - head_y # Moves available before hitting the bottom wall
+        if self.corridor < 1:
+            raise ValueError(f"Scenario {name} leaves no room to move.")
+
+    def snapshot(self):
+        """Returns the snake body, for restore() after some raw Snake.move() calls."""
+        return list(self.board.snake.body)
+
+    def restore(self, body):
+        """Lays the snake out again as it was in `body` (outside of the timed sections)."""
+        snake = self.board.snake
+        while snake.body:
+            snake.retract_head()
+        for cell in body:
+            snake.extend_tail(cell)
+        snake.direction = snake.next_direction = (0, 1)
+
+
+def best_ns(run_batch, rounds=ROUNDS):
+    """Runs `run_batch()` -> (seconds, ops) several times and returns the best cost per op in ns."""
+    samples = []
+    for _ in range(rounds):
+        seconds, ops = run_batch()
+        samples.append(seconds * 1e9 / ops)
+    return min(samples)
+
+
+def bench_config_load(scenario):
+    def run():
+        start = time.perf_counter()
+        Board(scenario.config_path)
+        return time.perf_counter() - start, 1
+    return best_ns(run, rounds=3)
+
+
+def bench_level_load(scenario):
+    def run():
+        start = time.perf_counter()
+        Board(scenario.level_path)
+        return time.perf_counter() - start, 1
+    return best_ns(run, rounds=3)
+
+
+def bench_round_restart(scenario):
+    """Starting the next round on the same level (what [C] on the Game Over screen does)."""
+    board = Board(scenario.config_path, seed=0) # Its own board, the scenario's layout is needed by the others
+    seeds = iter(range(1_000_000))
+    def run():
+        start = time.perf_counter()
+        board.reset(next(seeds))
+        return time.perf_counter() - start, 1
+    return best_ns(run, rounds=3)
+
+
+def bench_spawn_food(scenario):
+    board = scenario.board
+    def run():
+        start = time.perf_counter()
+        for _ in range(BATCH):
+            board.spawn_food()
+        return time.perf_counter() - start, BATCH
+    return best_ns(run)
+
+
+def bench_is_valid_move(scenario):
+    board = scenario.board
+    cells = [
+        (scenario.rng.randrange(-1, board.width + 1), scenario.rng.randrange(-1, board.height + 1))
+        for _ in range(BATCH)
+    ]
+    def run():
+        start = time.perf_counter()
+        for cell in cells:
+            board.is_valid_move(cell)
+        return time.perf_counter() - start, BATCH
+    return best_ns(run)
+
+
+def bench_snake_move(scenario):
+    snake = scenario.board.snake
+    moves = min(scenario.corridor, BATCH)
+    def run():
+        body = scenario.snapshot()
+        start = time.perf_counter()
+        for _ in range(moves):
+            snake.move()
+        elapsed = time.perf_counter() - start
+        scenario.restore(body)
+        return elapsed, moves
+    return best_ns(run)
+
+
+def bench_save_state(scenario):
+    board = scenario.board
+    def run():
+        start = time.perf_counter()
+        for _ in range(BATCH):
+            board.save_state()
+        elapsed = time.perf_counter() - start
+        board.history.clear()
+        return elapsed, BATCH
+    return best_ns(run)
+
+
+def bench_undo(scenario):
+    board = scenario.board
+    moves = min(scenario.corridor, BATCH)
+    def run():
+        for _ in range(moves):
+            board.save_state()
+            board.snake.move()
+        start = time.perf_counter()
+        for _ in range(moves):
+            board.undo()
+        return time.perf_counter() - start, moves
+    return best_ns(run)
+
+
+def bench_draw_frame(scenario, view):
+    """Cost of draw_all() after a single tick (the steady state)."""
+    snake = scenario.board.snake
+    moves = min(scenario.corridor, 100)
+    def run():
+        body = scenario.snapshot()
+        elapsed = 0.0
+        for _ in range(moves):
+            snake.move()
+            start = time.perf_counter()
+            view.draw_all()
+            elapsed += time.perf_counter() - start
+        scenario.restore(body)
+        view.draw_all()
+        return elapsed, moves
+    return best_ns(run)
+
+
+def bench_startup(scenario, view):
+    """Cold start of the game, from launching the interpreter to the first frame drawn."""
+    command = [sys.executable, os.path.join(SRC_DIR, 'main.py'), scenario.config_path, '--headless', '--frames', '1']
+    def run():
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        return time.perf_counter() - start, 1
+    return best_ns(run, rounds=3)
+
+
+def bench_draw_full(scenario, view):
+    """Cost of a full repaint (new round, overlays)."""
+    def run():
+        view.invalidate()
+        start = time.perf_counter()
+        view.draw_all()
+        return time.perf_counter() - start, 1
+    return best_ns(run, rounds=3)
+
+
+MODEL_BENCHMARKS = {
+    'config_load': bench_config_load,
+    'level_load': bench_level_load,
+    'round_restart': bench_round_restart,
+    'spawn_food': bench_spawn_food,
+    'is_valid_move': bench_is_valid_move,
+    'snake_move': bench_snake_move,
+    'save_state': bench_save_state,
+    'undo': bench_undo,
+}
+VIEW_BENCHMARKS = {
+    'draw_frame': bench_draw_frame,
+    'draw_full': bench_draw_full,
+    'startup': bench_startup,
+}
+
+
+def run_scenario(name, directory, with_view):
+    """Runs every benchmark on one scenario. Returns {"scenario/benchmark": ns per op}."""
+    if SCENARIOS[name] is None:
+        config_path = CLASSIC_CONFIG
+        with open(config_path) as f:
+            start = json.load(f)['initial_snake_position']
+        body = [tuple(start)]
+    else:
+        width, height, length, density = SCENARIOS[name]
+        config_path, body = write_config(directory, name, width, height, length, density, random.Random(name))
+    with open(config_path) as f:
+        level_path = os.path.join(directory, f'{name}.snkl')
+        BitmapLevel.from_config(json.load(f)).save(level_path)
+    scenario = Scenario(name, config_path, level_path, body)
+
+    results = {}
+    for bench_name, bench in MODEL_BENCHMARKS.items():
+        results[f'{name}/{bench_name}'] = bench(scenario)
+
+    if with_view:
+        from view import GameView
+        view = GameView(scenario.board)
+        view.draw_all()
+        for bench_name, bench in VIEW_BENCHMARKS.items():
+            results[f'{name}/{bench_name}'] = bench(scenario, view)
+        scenario.board.dirty_cells = None
+    return results
+
+
+def format_ns(ns):
+    for unit, scale in (('s', 1e9), ('ms', 1e6), ('us', 1e3)):
+        if ns >= scale:
+            return f'{ns / scale:.2f} {unit}'
+    return f'{ns:.0f} ns'
+
+
+def compare(results, baseline, threshold):
+    """Prints the change against a baseline. Returns the names of the benchmarks that regressed."""
+    regressions = []
+    for key, ns in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f'{key:32} {format_ns(ns):>12}   (new)')
+            continue
+        ratio = ns / base
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print(f'{key:32} {format_ns(ns):>12}   x{ratio:.2f} vs {format_ns(base)}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Snake model and view hot paths.")
+    parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--quick', action='store_true', help="Only run the small scenarios")
+    parser.add_argument('--no-view', action='store_true', help="Skip the rendering benchmarks")
+    parser.add_argument('--save', metavar='FILE', help="Write the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='FILE', help="Compare against a saved baseline and fail on regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    names = args.scenarios or (QUICK_SCENARIOS if args.quick else list(SCENARIOS))
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            results.update(run_scenario(name, directory, not args.no_view))
+            if not args.compare:
+                for key in results:
+                    if key.startswith(f'{name}/'):
+                        print(f'{key:32} {format_ns(results[key]):>12}')
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+
+    if args.save:
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'results': results, # Nanoseconds per operation
+        }
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Board, Snake, DIRECTIONS, EMPTY, OBSTACLE, SNAKE
+
+FOOD_REWARD = 10
+PLACEMENT_ATTEMPTS = 100 # Draws before giving up on finding a cell that is free and has no food
+
+# Causes of death, as stored in Arena.causes
+WALL = 'wall'
+OBSTACLE_HIT = 'obstacle'
+BODY = 'body'
+HEAD_ON = 'head-on'
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+
+class Arena:
+    """
+    Many snakes sharing one board.
+
+    The board's own snake is snake 0 and the others are spawned on random
+    free cells. Every snake notifies the board of the cells it enters and
+    leaves, so the board grid is a shared occupancy map of all of them.
+
+    step() moves every living snake at once. Each move is judged against the
+    board as it was at the start of the tick, where the tail of a snake that
+    is not growing counts as free:
+      - walls and obstacles kill, as in Board.step();
+      - a head entering any body (its own or another snake's) dies;
+      - heads entering the same cell all die, so contested food is never eaten;
+      - two heads moving into each other's cell both die instead of swapping.
+    The outcome does not depend on the order of the snakes, and a tick costs
+    a few dictionary and grid lookups per snake.
+    """
+    def __init__(self, board: Board, num_snakes, food_count=None):
+        self.board = board
+        self.rng = board.rng
+
+        # Several food items instead of the board's single one
+        board.food = None
+        self.food = set()
+
+        self.snakes = [board.snake]
+        for _ in range(num_snakes - 1):
+            cell = self._free_cell()
+            if cell is None:
+                raise ValueError("Arena Error: Not enough room for every snake.")
+            snake = Snake(cell, board=board)
+            board.occupy(cell)
+            self.snakes.append(snake)
+
+        # Start heading towards the far side wall
+        for snake in self.snakes:
+            heading = (1, 0) if snake.body[0][0] < board.width // 2 else (-1, 0)
+            snake.direction = snake.next_direction = heading
+
+        self.living = list(range(num_snakes)) # Indices of the living snakes, in order
+        self.scores = [0] * num_snakes
+        self.causes = [None] * num_snakes # Cause of death, None while alive
+        self.ticks = 0
+
+        for _ in range(food_count or num_snakes):
+            self._spawn_food()
+
+    def _free_cell(self):
+        """Returns a random cell with no snake, obstacle or food, or None."""
+        for _ in range(PLACEMENT_ATTEMPTS):
+            cell = self.board.spawn_food()
+            if cell is None:
+                return None
+            if cell not in self.food:
+                return cell
+        return None
+
+    def _spawn_food(self):
+        cell = self._free_cell()
+        if cell is not None:
+            self.food.add(cell)
+            self.board.mark_dirty(cell)
+
+    def step(self, actions=None):
+        """
+        Advances every living snake by one tick.
+
+        Args:
+            actions: One (dx, dy) heading or None per snake (indexed like
+                `snakes`). None keeps the current heading.
+
+        Returns:
+            The indices of the snakes that died during this tick.
+        """
+        if actions is not None:
+            for i in self.living:
+                if actions[i] is not None:
+                    self.snakes[i].set_direction(actions[i])
+
+        board = self.board
+        grid = board.grid
+
+        # Where every head is going, and which tails move out of the way
+        moves = []
+        heads = {} # Cell -> number of heads entering it
+        targets = {} # Current head cell -> the cell that head moves to
+        vacated = set()
+        for i in self.living:
+            snake = self.snakes[i]
+            snake.direction = snake.next_direction
+            dx, dy = snake.direction
+            head_x, head_y = snake.body[0]
+            new_head = (head_x + dx, head_y + dy)
+            moves.append((i, new_head))
+            heads[new_head] = heads.get(new_head, 0) + 1
+            targets[snake.body[0]] = new_head
+            if not snake.grow:
+                vacated.add(snake.body[-1])
+
+        # Judge every move against the start of the tick
+        survivors = []
+        dead = []
+        for i, cell in moves:
+            x, y = cell
+            head = self.snakes[i].body[0]
+            if x < 0 or x >= board.width or y < 0 or y >= board.height:
+                cause = WALL
+            else:
+                state = grid.get(cell)
+                if state == OBSTACLE:
+                    cause = OBSTACLE_HIT
+                elif targets.get(cell) == head:
+                    cause = HEAD_ON # Two heads swapping cells would pass through each other
+                elif state == SNAKE and cell not in vacated:
+                    cause = BODY
+                elif heads[cell] > 1:
+                    cause = HEAD_ON
+                else:
+                    survivors.append((i, cell))
+                    continue
+            self.causes[i] = cause
+            dead.append(i)
+
+        # Clear every cell that is freed up before any head moves in
+        for i in dead:
+            snake = self.snakes[i]
+            while snake.body:
+                snake.retract_tail()
+        for i, _ in survivors:
+            snake = self.snakes[i]
+            if snake.grow:
+                snake.grow = False
+            else:
+                snake.retract_tail()
+
+        eaten = 0
+        for i, cell in survivors:
+            snake = self.snakes[i]
+            snake.extend_head(cell)
+            if cell in self.food:
+                self.food.discard(cell)
+                snake.eat()
+                self.scores[i] += FOOD_REWARD
+                eaten += 1
+
+        # Replacement food goes on cells that are free after the moves
+        for _ in range(eaten):
+            self._spawn_food()
+
+        self.living = [i for i, _ in survivors]
+        self.ticks += 1
+        return dead
+
+
+def wander(arena, rng, turn_chance=0.1):
+    """Simple bot for every snake: keeps going, turning at random or when the next cell is taken."""
+    grid = arena.board.grid
+    width, height = arena.board.width, arena.board.height
+    actions = [None] * len(arena.snakes)
+    for i in arena.living:
+        snake = arena.snakes[i]
+        head_x, head_y = snake.body[0]
+        options = []
+        for dx, dy in DIRECTIONS:
+            x, y = head_x + dx, head_y + dy
+            if (dx, dy) != (-snake.direction[0], -snake.direction[1]) and 0 <= x < width and 0 <= y < height and grid.get((x, y)) == EMPTY:
+                options.append((dx, dy))
+        if options and (snake.direction not in options or rng.random() < turn_chance):
+            actions[i] = rng.choice(options)
+    return actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless multi-snake arena with wandering bots.")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="Level to play on (JSON or .snkl)")
+    parser.add_argument('--snakes', type=int, default=100)
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        arena = Arena(Board(args.config, seed=args.seed), args.snakes)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    moves = 0
+    start = time.perf_counter()
+    while arena.ticks < args.ticks and arena.living:
+        moves += len(arena.living)
+        arena.step(wander(arena, rng))
+    elapsed = time.perf_counter() - start
+
+    print(f"{arena.ticks} ticks, {len(arena.living)}/{args.snakes} snakes alive, best score {max(arena.scores)}")
+    print(f"{elapsed * 1000:.1f} ms ({elapsed * 1e6 / max(moves, 1):.2f} us per snake move)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,448 @@
+import heapq
+import time
+from array import array
+from collections import deque
+
+import numpy as np
+
+from models import Board, DIRECTIONS, EMPTY, SNAKE, FREE_INDEX_LIMIT
+
+FIELD_BUDGET = 0.0005 # Seconds per decision spent extending the distance field
+MAX_EXPANSIONS = 1000 # A* budget per search on maps too big for a distance field
+DETOUR_EXPANSIONS = 200 # A* budget for getting around the body when the distance field is blocked
+RETRY_INTERVAL = 8 # Ticks before planning again towards food that had no safe path
+CYCLE_FILL_RATIO = 0.5 # Follow the Hamiltonian cycle once the snake covers this much of the board
+
+
+def hamiltonian_cycle(width, height):
+    """Returns the cells of a Hamiltonian cycle of an empty board in order, or None if it has none."""
+    if width < 2 or height < 2 or (width % 2 and height % 2):
+        return None
+    if height % 2:
+        return [(x, y) for y, x in hamiltonian_cycle(height, width)]
+
+    # Snake through the rows, leaving column 0 as the way back up
+    order = [(0, 0)]
+    for y in range(height):
+        columns = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+        order.extend((x, y) for x in columns)
+    order.extend((0, y) for y in range(height - 1, 0, -1))
+    return order
+
+
+class DistanceField:
+    """
+    Breadth-first distances from one target cell, around the obstacles.
+
+    The field grows one wavefront at a time with whole-array NumPy
+    operations, and grow() stops when its time budget runs out, so the work
+    is spread over as many ticks as needed. The snake is ignored because
+    its body keeps moving. The Autopilot checks the body when it walks the
+    field.
+    """
+    def __init__(self, blocked, target):
+        self.target = target
+        self.dist = np.full(blocked.shape, -1, dtype=np.int32)
+        self.open = ~blocked
+        self.front = np.zeros(blocked.shape, dtype=bool)
+
+        x, y = target
+        self.dist[y, x] = 0
+        self.open[y, x] = False
+        self.front[y, x] = True
+        self.depth = 0
+
+    @property
+    def complete(self):
+        return not self.front.any()
+
+    def grow(self, budget=None, until=None):
+        """Adds wavefronts for up to `budget` seconds (no limit if None), or until cell `until` has a distance."""
+        deadline = None if budget is None else time.perf_counter() + budget
+        spread = np.empty_like(self.front)
+        while not self.complete and (until is None or self.get(until) < 0):
+            spread[:] = False
+            spread[1:] |= self.front[:-1]
+            spread[:-1] |= self.front[1:]
+            spread[:, 1:] |= self.front[:, :-1]
+            spread[:, :-1] |= self.front[:, 1:]
+            spread &= self.open
+
+            self.depth += 1
+            self.open &= ~spread
+            self.dist[spread] = self.depth
+            self.front, spread = spread, self.front
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+    def get(self, cell):
+        """Distance from `cell` to the target, -1 if unknown (not reached yet or walled off)."""
+        return int(self.dist[cell[1], cell[0]])
+
+
+class Autopilot:
+    """
+    Steers a board's snake towards the food.
+
+    Call decide() once before every tick and pass the result to
+    Snake.set_direction, like the arrow keys do.
+
+    Each food item gets a DistanceField, built a slice per tick and reused
+    until the food moves. Walking down the field gives a path. That path is
+    cached and followed until the food changes or the undo history rewrites
+    the snake. Body cells are time-aware: a segment that will have left by
+    the time the head gets there does not block the path. Each cell records
+    the tick at which the head entered it, one entry per tick, which gives
+    how long every segment still stays. A path is only taken if, after
+    eating, the head could still follow its own tail.
+
+    Without such a path the snake follows a Hamiltonian cycle of the board
+    when it has one (always once it is long), otherwise moves greedily
+    towards the food or into the largest open area.
+    """
+    def __init__(self, board: Board, field_budget=FIELD_BUDGET):
+        self.board = board
+        self.snake = board.snake
+        # Seconds per tick for the distance field. None builds it in one go, which makes the moves
+        # depend only on the game (for reproducible headless runs) at the cost of slower first ticks.
+        self.field_budget = field_budget
+
+        self.entered = {} # Cell -> tick at which the head entered it
+        self.tick = 0
+        self.last_head = None
+        self.last_length = 0
+
+        self.path = deque() # Cached cells leading to path_target
+        self.path_target = None
+        self.retry_tick = 0 # No new plan for the same food before this tick
+        self.fallback = deque() # Cached cells of the last safe fallback, used while no plan is found
+
+        self.blocked = None # (height, width) obstacle mask, built on first use
+        self.field = None
+        self.cycle_move = None # Last heading returned by _cycle_move()
+        self.cycle_next = None # Flat cell index -> next flat index on the Hamiltonian cycle
+        self.cycle_checked = False
+        self.cycle_run = 0 # Consecutive ticks spent on the cycle, the body lies on it once this reaches its length
+
+    def decide(self):
+        """Returns the (dx, dy) heading to take on the next tick."""
+        self._sync()
+        move = self._decide()
+        if self.cycle_run and move != self.cycle_move:
+            self.cycle_run = 0
+        return move
+
+    def _decide(self):
+        board = self.board
+        food = board.food
+
+        if len(self.snake.body) >= CYCLE_FILL_RATIO * board.width * board.height:
+            move = self._cycle_move()
+            if move is not None:
+                return move
+
+        # Keep following the cached path while it stays clear
+        if self.path and self.path_target == food and self._passable(self.path[0], 1):
+            direction = self._direction_to(self.path.popleft())
+            if direction in DIRECTIONS: # Undo can bring back the same head and length with another body
+                return direction
+        self.path.clear()
+        self.path_target = None
+
+        if food is not None and self.tick >= self.retry_tick:
+            path = self._plan(food)
+            if path is not None and self._is_safe(path):
+                self.path = path
+                self.path_target = food
+                self.fallback.clear()
+                return self._direction_to(self.path.popleft())
+            if path is not None or self.field is None or self.field.complete:
+                self.retry_tick = self.tick + RETRY_INTERVAL
+
+        # No safe way to the food yet
+        move = self._cycle_move()
+        if move is None:
+            return self._fallback_move(food)
+        self.fallback.clear()
+        return move
+
+    def _sync(self):
+        """Updates the entry ticks after the snake moved, or rebuilds them after anything else."""
+        body = self.snake.body
+        head, length = body[0], len(body)
+        if head == self.last_head and length == self.last_length:
+            return
+
+        if self.last_head is not None and (length == 1 or body[1] == self.last_head) \
+                and self.last_length <= length <= self.last_length + 1:
+            self.tick += 1
+            self.entered[head] = self.tick
+        else:
+            # First decision, undo/rewind or a manual move: stamp the whole body again
+            self.tick += length
+            self.entered = {cell: self.tick - i for i, cell in enumerate(body)}
+            self.path.clear()
+            self.path_target = None
+            self.fallback.clear()
+            self.retry_tick = 0
+            self.cycle_run = 0
+
+        self.last_head = head
+        self.last_length = length
+
+    def _passable(self, cell, moves):
+        """Whether the head can be on `cell` after `moves` ticks from now."""
+        x, y = cell
+        if x < 0 or x >= self.board.width or y < 0 or y >= self.board.height:
+            return False
+
+        state = self.board.grid.get(cell)
+        if state == EMPTY:
+            return True
+        if state != SNAKE or cell not in self.entered:
+            return False
+
+        # The segment `index` cells behind the head leaves after `length - index` ticks (one more while growing)
+        index = self.tick - self.entered[cell]
+        return moves >= len(self.snake.body) - index + self.snake.grow
+
+    def _plan(self, food):
+        """A path from the head to the food, or None if there is none (yet)."""
+        board = self.board
+        if board.width * board.height > FREE_INDEX_LIMIT:
+            return self._search(food)
+
+        if self.field is None or self.field.target != food:
+            if self.blocked is None:
+                self.blocked = np.zeros((board.height, board.width), dtype=bool)
+                if board.level is not None:
+                    self.blocked[:] = board.level.obstacle_mask()
+                elif board.config['initial_obstacles']:
+                    cells = np.asarray(board.config['initial_obstacles']).reshape(-1, 2)
+                    self.blocked[cells[:, 1], cells[:, 0]] = True
+            self.field = DistanceField(self.blocked, food)
+
+        head = self.snake.body[0]
+        self.field.grow(self.field_budget, until=head)
+        if self.field.get(head) < 0:
+            return None
+
+        # Walk down the field, stepping only on cells that are clear by the time the head arrives
+        path = deque()
+        cell, dist = head, self.field.get(head)
+        behind = self._behind()
+        while dist > 0:
+            for dx, dy in DIRECTIONS:
+                nxt = (cell[0] + dx, cell[1] + dy)
+                if path or nxt != behind:
+                    if self._passable(nxt, len(path) + 1) and self.field.get(nxt) == dist - 1:
+                        break
+            else:
+                # The body is in the way: look for a short detour, or wait for it to move
+                self.retry_tick = self.tick + RETRY_INTERVAL
+                return self._search(food, DETOUR_EXPANSIONS)
+            path.append(nxt)
+            cell, dist = nxt, dist - 1
+        return path
+
+    def _search(self, goal, budget=MAX_EXPANSIONS):
+        """A* from the head to `goal`, expanding at most `budget` cells. Returns the path (excluding the head) or None."""
+        head = self.snake.body[0]
+        goal_x, goal_y = goal
+        frontier = [(abs(head[0] - goal_x) + abs(head[1] - goal_y), 0, head)]
+        came_from = {head: None}
+        behind = self._behind()
+        expansions = 0
+
+        while frontier:
+            _, moves, cell = heapq.heappop(frontier)
+            if cell == goal:
+                path = deque()
+                while cell != head:
+                    path.appendleft(cell)
+                    cell = came_from[cell]
+                return path
+
+            expansions += 1
+            if expansions > budget:
+                return None
+
+            moves += 1
+            for dx, dy in DIRECTIONS:
+                nxt = (cell[0] + dx, cell[1] + dy)
+                if nxt in came_from or not self._passable(nxt, moves):
+                    continue
+                if cell == head and nxt == behind:
+                    continue # The snake cannot turn back on the first step
+                came_from[nxt] = cell
+                heapq.heappush(frontier, (moves + abs(nxt[0] - goal_x) + abs(nxt[1] - goal_y), moves, nxt))
+        return None
+
+    def _is_safe(self, path, eats=True):
+        """
+        Whether the head can still follow its tail after taking `path` (and eating at its end).
+
+        Searches from the end of the path on the board as it will be on
+        arrival, where the snake covers the path and the front of its current
+        body. Reaching a segment by the time it leaves, or finding more room
+        than the snake needs, means the snake cannot get trapped.
+        """
+        length = len(self.snake.body) + self.snake.grow + eats
+        arrival = self.tick + len(path)
+        stamps = {cell: self.tick + i + 1 for i, cell in enumerate(path)}
+
+        def leaves_after(cell):
+            """Ticks after arrival until a cell is clear (0 if it already is, None if never)."""
+            stamp = stamps.get(cell)
+            if stamp is None:
+                state = self.board.grid.get(cell)
+                if state == EMPTY:
+                    return 0
+                if state != SNAKE or cell not in self.entered:
+                    return None
+                stamp = self.entered[cell]
+            return max(length - (arrival - stamp), 0)
+
+        seen = {path[-1]}
+        queue = deque([(path[-1], 0)])
+        while queue:
+            (x, y), moves = queue.popleft()
+            for dx, dy in DIRECTIONS:
+                nxt = (x + dx, y + dy)
+                if nxt in seen or not (0 <= nxt[0] < self.board.width and 0 <= nxt[1] < self.board.height):
+                    continue
+                wait = leaves_after(nxt)
+                if wait is None or wait > moves + 1:
+                    continue
+                if wait > 0 or len(seen) > 2 * length:
+                    return True # Caught up with a leaving segment, or found plenty of room
+                seen.add(nxt)
+                queue.append((nxt, moves + 1))
+        return False
+
+    def _cycle_move(self):
+        """Next step along the Hamiltonian cycle, if the board has one and it is safe to take."""
+        self.cycle_move = None
+        if not self.cycle_checked:
+            self.cycle_checked = True
+            self.cycle_next = self._build_cycle()
+        if self.cycle_next is None:
+            return None
+
+        width = self.board.width
+        head_x, head_y = self.snake.body[0]
+        index = self.cycle_next[head_y * width + head_x]
+        cell = (index % width, index // width)
+        if cell == self._behind() or not self._passable(cell, 1):
+            return None
+
+        # Until the whole body lies on the cycle, the cycle can lead into a pocket closed off by the body
+        length = len(self.snake.body)
+        if self.cycle_run < length and self._space(cell, length + 1) <= length:
+            return None
+
+        self.cycle_run += 1
+        self.cycle_move = self._direction_to(cell)
+        return self.cycle_move
+
+    def _build_cycle(self):
+        board = self.board
+        if board.free_cells is None:
+            return None
+        # Only for boards without obstacles: every cell is either free or snake
+        if len(board.free_cells) + len(self.snake.cells) != board.width * board.height:
+            return None
+        order = hamiltonian_cycle(board.width, board.height)
+        if order is None:
+            return None
+
+        cycle_next = array('i', bytes(4 * len(order)))
+        for (x, y), (next_x, next_y) in zip(order, order[1:] + order[:1]):
+            cycle_next[y * board.width + x] = next_y * board.width + next_x
+        return cycle_next
+
+    def _fallback_move(self, food):
+        """
+        Heads for the food through a neighbouring cell that keeps the tail within reach,
+        or else into the largest open area (straight on if everything is blocked).
+
+        A safe start is extended greedily towards the food for up to
+        RETRY_INTERVAL moves and checked once. The following ticks take the
+        cached moves while planning still finds nothing, instead of searching
+        the board again on every tick.
+        """
+        if self.fallback and self._passable(self.fallback[0], 1):
+            direction = self._direction_to(self.fallback.popleft())
+            if direction in DIRECTIONS:
+                return direction
+        self.fallback.clear()
+
+        head_x, head_y = self.snake.body[0]
+        limit = len(self.snake.body) + 1
+        behind = self._behind()
+        options = []
+        for dx, dy in DIRECTIONS:
+            cell = (head_x + dx, head_y + dy)
+            if cell != behind and self._passable(cell, 1):
+                options.append((self._distance(cell, food), (dx, dy), cell))
+        options.sort()
+
+        for _, direction, cell in options:
+            path = self._greedy_path(cell, food)
+            if self._is_safe(path, eats=path[-1] == food):
+                path.popleft()
+                self.fallback = path
+                return direction
+            if len(path) > 1 and self._is_safe([cell], eats=cell == food):
+                return direction # Safe for now, but the way on towards the food is not
+
+        best, best_space = self.snake.direction, 0
+        for _, direction, cell in options:
+            space = self._space(cell, limit)
+            if space > best_space:
+                best, best_space = direction, space
+        return best
+
+    def _greedy_path(self, start, food):
+        """Up to RETRY_INTERVAL cells from `start`, each the clear neighbour closest to the food."""
+        path = deque([start])
+        cell = start
+        while len(path) < RETRY_INTERVAL and cell != food:
+            options = []
+            for dx, dy in DIRECTIONS:
+                nxt = (cell[0] + dx, cell[1] + dy)
+                if nxt not in path and self._passable(nxt, len(path) + 1):
+                    options.append((self._distance(nxt, food), nxt))
+            if not options:
+                break
+            cell = min(options)[1]
+            path.append(cell)
+        return path
+
+    def _space(self, start, limit):
+        """Counts the cells reachable from `start` next tick, stopping at `limit`."""
+        seen = {start}
+        queue = deque([start])
+        while queue and len(seen) < limit:
+            x, y = queue.popleft()
+            for dx, dy in DIRECTIONS:
+                nxt = (x + dx, y + dy)
+                if nxt not in seen and self._passable(nxt, 1):
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return len(seen)
+
+    def _behind(self):
+        """The cell opposite the current heading: Snake.set_direction() ignores a turn back into it."""
+        head_x, head_y = self.snake.body[0]
+        dx, dy = self.snake.direction
+        return (head_x - dx, head_y - dy)
+
+    @staticmethod
+    def _distance(cell, food):
+        """Manhattan distance to the food (0 without food)."""
+        return abs(cell[0] - food[0]) + abs(cell[1] - food[1]) if food else 0
+
+    def _direction_to(self, cell):
+        head_x, head_y = self.snake.body[0]
+        return (cell[0] - head_x, cell[1] - head_y)
@@ -0,0 +1,173 @@
+import numpy as np
+
+from models import Board, DIRECTIONS
+
+# Action indices accepted by HeadlessEngine.step are indices into DIRECTIONS
+UP, DOWN, LEFT, RIGHT = range(4)
+NOOP = -1 # Keep the current heading
+
+FOOD_REWARD = 10
+
+_DX = np.array([dx for dx, _ in DIRECTIONS])
+_DY = np.array([dy for _, dy in DIRECTIONS])
+_OPPOSITE = np.array([DOWN, UP, RIGHT, LEFT, NOOP]) # Last entry maps NOOP to itself
+
+_NEVER = -2 ** 30 # "Entered" tick of a cell no head has visited yet
+_SPAWN_ATTEMPTS = 8 # Random draws per board before falling back to a full scan
+
+
+class HeadlessEngine:
+    """
+    Batched, display-free simulation of many boards at once.
+
+    Every board shares the layout of a template models.Board (size,
+    obstacles, starting position) and follows the same rules as
+    Board.step(). State lives in NumPy arrays indexed by board, so a single
+    call to step() advances all of them with a handful of vectorized
+    operations and no pygame, timers or per-board Python loops.
+
+    Snake bodies are not stored segment by segment: each cell records the
+    tick at which a head last entered it, and the cell belongs to the body
+    while fewer than `length` ticks have passed since then. Moving the tail
+    therefore costs nothing.
+    """
+    def __init__(self, board: Board, num_boards):
+        self.num_boards = num_boards
+        self.width = board.width
+        self.height = board.height
+        self.num_cells = self.width * self.height
+
+        # Static layout shared by every board
+        if board.level is not None:
+            self.blocked = board.level.obstacle_mask().ravel().copy()
+        else:
+            self.blocked = np.zeros(self.num_cells, dtype=bool)
+            for obs_x, obs_y in board.obstacles:
+                self.blocked[obs_y * self.width + obs_x] = True
+        start_x, start_y = board.config['initial_snake_position']
+        self.start = start_y * self.width + start_x
+
+        # Per board state
+        self.entered = np.empty((num_boards, self.num_cells), dtype=np.int32)
+        self.head = np.empty(num_boards, dtype=np.int64) # Flat cell index (y * width + x)
+        self.direction = np.empty(num_boards, dtype=np.int64) # Index into DIRECTIONS
+        self.length = np.empty(num_boards, dtype=np.int32)
+        self.grow = np.empty(num_boards, dtype=bool)
+        self.food = np.empty(num_boards, dtype=np.int64) # -1 when the board is full
+        self.score = np.empty(num_boards, dtype=np.int64)
+        self.ticks = np.empty(num_boards, dtype=np.int32)
+        self.done = np.empty(num_boards, dtype=bool)
+
+        self.rng = np.random.default_rng()
+        self.reset()
+
+    def reset(self, seed=None, boards=None):
+        """
+        Starts a new game on the selected boards.
+
+        Args:
+            seed: Reseeds the engine's random generator (food placement).
+            boards: Indices or boolean mask of the boards to reset, all of
+                them by default. `engine.reset(boards=engine.done)` restarts
+                only the finished games.
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
+        rows = self._select(boards)
+        self.entered[rows] = _NEVER
+        self.entered[rows, self.start] = 0
+        self.head[rows] = self.start
+        self.direction[rows] = RIGHT
+        self.length[rows] = 1
+        self.grow[rows] = False
+        self.score[rows] = 0
+        self.ticks[rows] = 0
+        self.done[rows] = False
+        self._spawn_food(rows)
+
+    def step(self, actions=None):
+        """
+        Advances every unfinished board by one tick.
+
+        Args:
+            actions: One action index per board (see DIRECTIONS). NOOP, or
+                None for all boards, keeps the current heading. 180-degree
+                turns are ignored, as in Snake.set_direction.
+
+        Returns:
+            A tuple (rewards, done) of per board arrays: the score gained
+            during this tick and whether the game is over.
+        """
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int64)
+            turn = (actions != NOOP) & (actions != _OPPOSITE[self.direction])
+            self.direction = np.where(turn, actions, self.direction)
+
+        rewards = np.zeros(self.num_boards, dtype=np.int64)
+        rows = np.flatnonzero(~self.done)
+
+        # Predict the next head position
+        direction = self.direction[rows]
+        x = self.head[rows] % self.width + _DX[direction]
+        y = self.head[rows] // self.width + _DY[direction]
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        cell = np.where(inside, y * self.width + x, 0)
+
+        # A growing snake keeps its tail, so the tail cell only frees up otherwise
+        ticks = self.ticks[rows] + 1
+        length = self.length[rows] + self.grow[rows]
+        hit = ~inside | self.blocked[cell] | (self.entered[rows, cell] > ticks - length)
+        self.done[rows[hit]] = True
+
+        # Move the surviving snakes
+        alive = ~hit
+        rows, cell = rows[alive], cell[alive]
+        self.entered[rows, cell] = ticks[alive]
+        self.head[rows] = cell
+        self.ticks[rows] = ticks[alive]
+        self.length[rows] = length[alive]
+        self.grow[rows] = False
+
+        # Check for Food
+        eaters = rows[cell == self.food[rows]]
+        self.grow[eaters] = True
+        self.score[eaters] += FOOD_REWARD
+        rewards[eaters] = FOOD_REWARD
+        self._spawn_food(eaters)
+
+        return rewards, self.done.copy()
+
+    def occupied(self, board):
+        """Returns a (height, width) boolean grid of the cells blocked on one board."""
+        body = self.entered[board] > self.ticks[board] - self.length[board]
+        return (body | self.blocked).reshape(self.height, self.width)
+
+    def _select(self, boards):
+        """Normalizes a board selection to an array of indices."""
+        if boards is None:
+            return np.arange(self.num_boards)
+        boards = np.asarray(boards)
+        if boards.dtype == bool:
+            return np.flatnonzero(boards)
+        return boards.astype(np.int64)
+
+    def _spawn_food(self, rows):
+        """Places food in a random free cell on each of the given boards."""
+        # Rejection sampling is O(1) per board while the board is mostly empty
+        pending = rows
+        for _ in range(_SPAWN_ATTEMPTS):
+            if not pending.size:
+                return
+            cells = self.rng.integers(0, self.num_cells, size=pending.size)
+            free = ~self.blocked[cells] & (
+                self.entered[pending, cells] <= self.ticks[pending] - self.length[pending]
+            )
+            self.food[pending[free]] = cells[free]
+            pending = pending[~free]
+
+        # Crowded boards: pick uniformly among the cells that are actually free
+        for board in pending:
+            body = self.entered[board] > self.ticks[board] - self.length[board]
+            available = np.flatnonzero(~(body | self.blocked))
+            self.food[board] = self.rng.choice(available) if available.size else -1
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import CHUNK_SIZE, LEVEL_MAGIC
+
+# Binary level file (.snkl): a header followed by the obstacle bitmap
+#   header: magic, format version, cell size, width, height, snake start x, snake start y
+#   bitmap: `height` rows of ceil(width / 8) bytes, bit x % 8 of byte x // 8 set for an obstacle
+LEVEL_EXTENSION = '.snkl'
+MAGIC = LEVEL_MAGIC
+VERSION = 1
+HEADER = struct.Struct('<4sBHIIII')
+
+
+def check_obstacle_bounds(obstacles, width, height):
+    """Vectorized bounds check of a list of [x, y] obstacles, raising the same error as Board."""
+    cells = np.asarray(obstacles, dtype=np.int64).reshape(-1, 2)
+    outside = (cells[:, 0] < 0) | (cells[:, 0] >= width) | (cells[:, 1] < 0) | (cells[:, 1] >= height)
+    if outside.any():
+        ox, oy = cells[np.argmax(outside)]
+        raise ValueError(f"Config Error: Obstacle at position ({ox}, {oy}) is outside the board boundaries.")
+    return cells
+
+
+class BitmapLevel:
+    """
+    Obstacle layout stored as a packed bitmap, one bit per cell.
+
+    The bitmap can be memory-mapped straight from a .snkl file, in which case
+    only the parts of the map the game touches are ever read from disk:
+    chunk() unpacks one grid chunk at a time for models.ChunkedGrid.
+    """
+    def __init__(self, width, height, cell_size, start, bits):
+        self.width = width
+        self.height = height
+        self.bits = bits # uint8 array of shape (height, row_bytes)
+
+        self.config = {
+            'board_size': {'width': width, 'height': height},
+            'cell_size': cell_size,
+            'initial_snake_position': list(start),
+            'initial_obstacles': [], # Obstacles come from the bitmap
+            'obstacle_checksum': zlib.adler32(self.bits), # Lets replays tell levels apart
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds a level from a parsed JSON config."""
+        width, height = config['board_size']['width'], config['board_size']['height']
+        cells = check_obstacle_bounds(config['initial_obstacles'], width, height)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        mask[cells[:, 1], cells[:, 0]] = 1
+        bits = np.packbits(mask, axis=1, bitorder='little')
+        return cls(width, height, config['cell_size'], config['initial_snake_position'], bits)
+
+    def obstacle_mask(self):
+        """Returns a (height, width) boolean array of the obstacles."""
+        return np.unpackbits(self.bits, axis=1, count=self.width, bitorder='little').view(bool)
+
+    def chunk(self, cx, cy):
+        """ChunkedGrid loader: the obstacle states of one chunk, or None if it has none."""
+        rows = self.bits[cy * CHUNK_SIZE:(cy + 1) * CHUNK_SIZE, cx * CHUNK_SIZE // 8:(cx + 1) * CHUNK_SIZE // 8]
+        if not rows.any():
+            return None
+
+        cells = np.unpackbits(rows, axis=1, bitorder='little')
+        data = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+        data[:cells.shape[0], :cells.shape[1]] = cells # Edge chunks are smaller than CHUNK_SIZE
+        return bytearray(data.tobytes())
+
+    def free_cell_index(self):
+        """
+        Precomputes the arrays of a models.FreeCells for this level.
+
+        Returns:
+            (cells, slots, size): int32 buffers and the number of free cells.
+        """
+        free = np.flatnonzero(~self.obstacle_mask().ravel()).astype(np.int32)
+        cells = np.zeros(self.width * self.height, dtype=np.int32)
+        cells[:free.size] = free
+        slots = np.full(self.width * self.height, -1, dtype=np.int32)
+        slots[free] = np.arange(free.size, dtype=np.int32)
+        return cells.tobytes(), slots.tobytes(), free.size
+
+    def save(self, path):
+        start_x, start_y = self.config['initial_snake_position']
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.config['cell_size'], self.width, self.height, start_x, start_y))
+            f.write(np.ascontiguousarray(self.bits).tobytes())
+
+
+def load_level(path, mmap=True):
+    """Loads a .snkl level, memory-mapping the bitmap unless `mmap` is False."""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("Config Error: Level file is too short.")
+
+    magic, version, cell_size, width, height, start_x, start_y = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Config Error: Not a level file or unsupported version.")
+
+    row_bytes = (width + 7) // 8
+    if os.path.getsize(path) != HEADER.size + height * row_bytes:
+        raise ValueError("Config Error: Level file size does not match its board size.")
+
+    if mmap:
+        bits = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size, shape=(height, row_bytes))
+    else:
+        bits = np.fromfile(path, dtype=np.uint8, offset=HEADER.size).reshape(height, row_bytes)
+
+    # Padding bits past the right edge would be obstacles outside the board
+    if width % 8 and (bits[:, -1] >> (width % 8)).any():
+        raise ValueError("Config Error: Level has obstacles outside the board boundaries.")
+
+    return BitmapLevel(width, height, cell_size, (start_x, start_y), bits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a JSON level to the binary .snkl format.")
+    parser.add_argument('config', help="JSON config (see config/config.json)")
+    parser.add_argument('output', help=f"Level file to write ({LEVEL_EXTENSION})")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    try:
+        BitmapLevel.from_config(config).save(args.output)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == '__main__':
+    main()
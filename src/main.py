@@ -1,36 +1,81 @@
 import pygame
+import argparse
 import os
 import sys
-import json
+import time
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__))) 
 
 from models import Board
 from view import GameView
+from timing import FixedTimestep, now_ms
+from replay import ReplayRecorder
+from profiling import FrameProfiler
+from persistence import ScoreStore
+# autopilot (NumPy) and stream (asyncio) are imported when first used, to keep startup short
 
-FPS = 60 # Pygame refresh rate
+MAX_SPEED = 60 # Ticks per second at the top speed
 UNDO_FREEZE_DURATION = 3000 # 3 seconds to react 
+REWIND_SECONDS = 5 # How far back [R] rewinds
 
 HIGHSCORE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'highscore.json')
+REPLAY_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'replays')
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'profiles')
 
-def load_high_score():
-    """Load high score from file."""
-    if not os.path.exists(HIGHSCORE_FILE):
-        return 0
-    try:
-        with open(HIGHSCORE_FILE, 'r') as f:
-            data = json.load(f)
-            return data.get("high_score", 0)
-    except (json.JSONDecodeError, ValueError):
-        return 0
-    
-def save_high_score(score):
-    """Save high score to file."""
+# Debug hotkeys: [F3] timing overlay, [F4] export the frame trace, [F5] cProfile the next frames
+PROFILE_FRAMES = 300
+DEBUG_REFRESH = 250 # ms between overlay updates
+
+def save_replay(recorder, round_count, score):
+    """Archive the inputs of a finished round, and its final score, to the replays folder."""
+    if not recorder.ticks:
+        return
+    path = os.path.join(REPLAY_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-round{round_count}.snkr")
     try:
-        with open(HIGHSCORE_FILE, 'w') as f:
-            json.dump({"high_score": score}, f)
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        recorder.save(path, score)
     except IOError:
-        print("Error saving high score.")
+        print("Error saving replay.")
+
+def handle_debug_key(key, profiler, view):
+    """Handles the profiling hotkeys. Returns True if the key was one of them."""
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    if key == pygame.K_F3:
+        profiler.toggle()
+        view.invalidate() # Remove or make room for the overlay
+    elif key == pygame.K_F4:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            for ext in ('json', 'csv'):
+                profiler.export(os.path.join(PROFILE_DIR, f"trace-{stamp}.{ext}"))
+            print(f"Frame trace saved to {PROFILE_DIR}")
+        except IOError:
+            print("Error saving frame trace.")
+    elif key == pygame.K_F5:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if profiler.start_profile(PROFILE_FRAMES, os.path.join(PROFILE_DIR, f"profile-{stamp}.prof")):
+            print(f"Profiling the next {PROFILE_FRAMES} frames...")
+    else:
+        return False
+    return True
+
+def wait_for_events(timeout):
+    """
+    Sleeps until an event arrives or `timeout` milliseconds pass (forever if None).
+
+    Returns:
+        The list of pending events, possibly empty.
+    """
+    if timeout is None:
+        first = pygame.event.wait()
+    elif timeout > 0:
+        first = pygame.event.wait(max(1, int(timeout))) # wait(0) would block forever
+    else:
+        return pygame.event.get()
+
+    if first.type == pygame.NOEVENT:
+        return []
+    return [first] + pygame.event.get()
 
 def main():
     """
@@ -43,130 +88,223 @@ def main():
     4. Special states (Freeze/Undo mechanics).
     """
     
+    parser = argparse.ArgumentParser(description="Play Snake.")
+    parser.add_argument('config', nargs='?', help="JSON config or binary level (see levels.py)",
+                        default=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.json'))
+    parser.add_argument('--stream', metavar='ADDRESS', help="Let spectators follow the game (unix:PATH, tcp:HOST:PORT or PORT, see stream.py)")
+    parser.add_argument('--headless', action='store_true', help="Run without a window (SDL dummy driver); the session ends with the first round")
+    parser.add_argument('--frames', type=int, metavar='N', help="Quit after drawing N frames")
+    parser.add_argument('--record', action='store_true', help="Save high scores and replays in headless mode too")
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy' # Must be set before the display starts
+    # Test and benchmark runs must not leave rounds in the real high scores or the replays folder
+    keep_records = not args.headless or args.record
+
     # Initialize Model
-    config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', 'config.json')
-    
+    config_path = args.config
     try:
         board = Board(config_path)
     except ValueError as e:
         print(f"Error loading configuration: {e}")
         return
 
+    stream = None
+    if args.stream:
+        from stream import StreamServer
+        try:
+            stream = StreamServer(args.stream) # Serves from its own thread, publishing only queues a message
+            stream.start()
+        except (OSError, ValueError) as e:
+            print(f"Error starting the stream server: {e}")
+            return
+        print(f"Streaming on {':'.join(map(str, stream.address))}")
+        stream.publish(board)
+
     # Initialize View
     view = GameView(board)
-    clock = pygame.time.Clock()
+    recorder = ReplayRecorder(board)
+    profiler = FrameProfiler()
+    debug_lines = None
+    debug_refresh_time = 0
     
     # Game State Variables
     running = True
     game_over = False
-    high_score = load_high_score()
+    scores = ScoreStore(HIGHSCORE_FILE) # Saves in a background thread
+    high_score = scores.high_score
     round_count = 1
     snake_speed = 5
     unpause_time = 0 # Time marker for freeze state when undoing
+    autopilot = None # Steers the snake while enabled with [A]
+    frame_count = 0
 
-    # Separate render (FPS) from gameplay (Tick rate - snake speed) 
-    MOVE_EVENT = pygame.USEREVENT + 1 
-    pygame.time.set_timer(MOVE_EVENT, 1000 // snake_speed) # Set a timer for the snake movement
+    # Separate render from gameplay (Tick rate - snake speed) 
+    timestep = FixedTimestep(snake_speed)
+    wait_time = 0 # How long the loop may sleep before the next wake-up (None = until input)
 
     while running:
-        current_time = pygame.time.get_ticks()
+        # Sleep until input arrives or the next tick / countdown step is due
+        with profiler.phase('idle'):
+            events = wait_for_events(wait_time)
         
-        # Check if we are in frozen state (after undoing)
-        is_frozen = current_time < unpause_time
+        current_time = now_ms()
         
         # --- Controller: Handle Input ---
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
+        with profiler.phase('events'):
+            for event in events:
+                if event.type == pygame.QUIT:
+                    running = False
             
-            if event.type == pygame.KEYDOWN:
-                if not game_over:
-                    # Normal gameplay controls
-                    if event.key == pygame.K_UP:
-                        board.snake.set_direction((0, -1))
-                    elif event.key == pygame.K_DOWN:
-                        board.snake.set_direction((0, 1))
-                    elif event.key == pygame.K_LEFT:
-                        board.snake.set_direction((-1, 0))
-                    elif event.key == pygame.K_RIGHT:
-                        board.snake.set_direction((1, 0))
-                    
-                    # Speed controls
-                    elif event.key == pygame.K_EQUALS or event.key == pygame.K_PLUS:
-                        snake_speed = min(snake_speed + 1, 20)
-                        pygame.time.set_timer(MOVE_EVENT, 1000 // snake_speed)
-                        
-                    elif event.key == pygame.K_MINUS:
-                        snake_speed = max(snake_speed - 1, 1)
-                        pygame.time.set_timer(MOVE_EVENT, 1000 // snake_speed)
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    view.invalidate()
+            
+                if event.type == pygame.KEYDOWN and handle_debug_key(event.key, profiler, view):
+                    continue
                 
-                else:
-                    # Game Over controls
-                    if event.key == pygame.K_c:
-                        # Continue to next round
-                        round_count += 1
-                        board = Board(config_path)
-                        view.board = board # Update the view to have a new board
-                        game_over = False
-                        unpause_time = 0
-                        snake_speed = 5
-                        pygame.time.set_timer(MOVE_EVENT, 1000 // snake_speed)
+                if event.type == pygame.KEYDOWN:
+                    if not game_over:
+                        # Normal gameplay controls
+                        if event.key == pygame.K_UP:
+                            board.snake.set_direction((0, -1))
+                        elif event.key == pygame.K_DOWN:
+                            board.snake.set_direction((0, 1))
+                        elif event.key == pygame.K_LEFT:
+                            board.snake.set_direction((-1, 0))
+                        elif event.key == pygame.K_RIGHT:
+                            board.snake.set_direction((1, 0))
+                    
+                        elif event.key == pygame.K_a:
+                            from autopilot import Autopilot
+                            autopilot = None if autopilot else Autopilot(board)
                     
-                    elif event.key == pygame.K_q:
-                        # Quit game
-                        running = False
+                        # Speed controls
+                        elif event.key == pygame.K_EQUALS or event.key == pygame.K_PLUS:
+                            snake_speed = min(snake_speed + 1, MAX_SPEED)
+                            timestep.set_rate(snake_speed)
                         
-                    elif event.key == pygame.K_u:
-                        # Undo
-                        if board.undo():
+                        elif event.key == pygame.K_MINUS:
+                            snake_speed = max(snake_speed - 1, 1)
+                            timestep.set_rate(snake_speed)
+                
+                    else:
+                        # Game Over controls
+                        if event.key == pygame.K_c:
+                            # Continue to next round
+                            if keep_records:
+                                with profiler.phase('io'):
+                                    save_replay(recorder, round_count, board.score)
+                            round_count += 1
+                            # Same level: reuse the parsed config, loaded chunks and the view's obstacle layer
+                            board.reset()
+                            recorder = ReplayRecorder(board, recorder.digest)
+                            if stream:
+                                stream.publish(board, keyframe=True)
+                            if autopilot:
+                                autopilot = Autopilot(board)
                             game_over = False
-                            # Freeze the game for 3 seconds to let the player react
-                            unpause_time = current_time + UNDO_FREEZE_DURATION
+                            unpause_time = 0
                             snake_speed = 5
-                            pygame.time.set_timer(MOVE_EVENT, 1000 // snake_speed)
+                            timestep.set_rate(snake_speed)
+                            timestep.reset(current_time) # The time spent on the Game Over screen is not owed as ticks
+                    
+                        elif event.key == pygame.K_q:
+                            # Quit game
+                            running = False
+                        
+                        elif event.key == pygame.K_u:
+                            # Undo
+                            if board.undo():
+                                recorder.record_undo(1)
+                                if stream:
+                                    stream.publish(board, keyframe=True)
+                                game_over = False
+                                # Freeze the game for 3 seconds to let the player react
+                                unpause_time = current_time + UNDO_FREEZE_DURATION
+                                snake_speed = 5
+                                timestep.set_rate(snake_speed)
+                                timestep.reset(current_time)
+                    
+                        elif event.key == pygame.K_r:
+                            # Rewind the last few seconds of play at the current speed
+                            if board.undo(REWIND_SECONDS * snake_speed):
+                                recorder.record_undo(REWIND_SECONDS * snake_speed)
+                                if stream:
+                                    stream.publish(board, keyframe=True)
+                                game_over = False
+                                unpause_time = current_time + UNDO_FREEZE_DURATION
+                                snake_speed = 5
+                                timestep.set_rate(snake_speed)
+                                timestep.reset(current_time)
 
-            if event.type == MOVE_EVENT and not game_over and not is_frozen:
-                # we save the state before updating (for undo functionality)
-                board.save_state()
-                
-                # --- Controller: Update Model ---
-                
-                # Predict the next head position
-                dx, dy = board.snake.next_direction
-                head_x, head_y = board.snake.body[0]
-                new_head = (head_x + dx, head_y + dy)
+        # Check if we are in frozen state (after undoing), including an undo just pressed
+        is_frozen = current_time < unpause_time
+        
+        # --- Controller: Update Model ---
+        with profiler.phase('update'):
+            if game_over or is_frozen:
+                timestep.reset(now_ms()) # Paused time must not pile up as pending ticks
+            else:
+                for _ in range(timestep.advance(now_ms())):
+                    if autopilot:
+                        board.snake.set_direction(autopilot.decide())
+                    
+                    # we save the state before updating (for undo functionality)
+                    board.save_state()
+                    recorder.record_tick(board.snake.next_direction)
                 
-                # Check for collisions (Wall/Obstacle)
-                if not board.is_valid_move(new_head):
-                    game_over = True
-                else:
-                    # Move the snake
-                    _, success = board.snake.move()
-                    if not success:
+                    if not board.step():
                         game_over = True
-                    else:
-                        new_head = board.snake.body[0]
-
-                        # Check for Food
-                        if new_head == board.food:
-                            board.snake.eat()
-                            board.food = board.spawn_food()
-                            board.score += 10
-                            
-        if game_over and board.score > high_score:  
-            high_score = board.score
-            save_high_score(high_score)
+                        break
+                    if stream:
+                        stream.publish(board)
+                
+                if game_over and keep_records:
+                    # Queued for the writer thread (an undo and a new crash replace the round's entry)
+                    scores.record_round(round_count, board.score, len(board.snake.body), board.seed)
+                    high_score = scores.high_score
         
         # Calculate countdown 
         freeze_remaining = None
         if is_frozen and not game_over:
-            freeze_remaining = (unpause_time - current_time) // 1000 + 1
+            freeze_remaining = int(unpause_time - current_time - 1) // 1000 + 1 # Whole seconds left, rounded up
+        
+        # Profiling overlay, refreshed a few times per second
+        if profiler.enabled:
+            if current_time >= debug_refresh_time:
+                debug_lines = profiler.summary_lines()
+                debug_refresh_time = current_time + DEBUG_REFRESH
+        else:
+            debug_lines = None
+        
+        # --- View: Draw State --- (only repaints what changed)
+        with profiler.phase('draw'):
+            view.draw_all(game_over, high_score, round_count, freeze_remaining, debug_lines)
         
-        # --- View: Draw State ---
-        view.draw_all(game_over, high_score, round_count, freeze_remaining)
+        profiler.end_frame()
+        frame_count += 1
+        if frame_count == args.frames or (args.headless and game_over):
+            running = False # Nobody can press a key in headless mode
+        if profiler.last_profile_report:
+            print(profiler.last_profile_report)
+            profiler.last_profile_report = None
         
-        clock.tick(FPS)
+        # Idle until something can change on screen
+        if game_over:
+            wait_time = None
+        elif is_frozen:
+            wait_time = (unpause_time - current_time) % 1000 + 1 # Next countdown digit
+        else:
+            wait_time = timestep.time_until_next()
+        if profiler.enabled:
+            wait_time = DEBUG_REFRESH if wait_time is None else min(wait_time, DEBUG_REFRESH)
 
+    if keep_records:
+        save_replay(recorder, round_count, board.score)
+    scores.close() # Waits for the last save
+    if stream:
+        stream.stop()
     view.cleanup()
 
 if __name__ == '__main__':
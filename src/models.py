@@ -1,6 +1,27 @@
 import json
 import random
-import copy
+from array import array
+from collections import deque
+
+HISTORY_SIZE = 3600 # Ticks kept for undo/rewind (a minute at the top speed of 60 ticks per second)
+
+# The four headings, in the same order as the arrow keys in main.py
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# Cell states stored in the board grid
+EMPTY, OBSTACLE, SNAKE = 0, 1, 2
+
+CHUNK_BITS = 6
+CHUNK_SIZE = 1 << CHUNK_BITS # Cells per side of a grid chunk
+CHUNK_MASK = CHUNK_SIZE - 1
+
+LEVEL_MAGIC = b'SNKL' # First bytes of a binary level file (see levels.py)
+VECTORIZE_THRESHOLD = 10_000 # Obstacle lists longer than this are validated with NumPy
+
+FREE_INDEX_LIMIT = 4_000_000 # Above this many cells, food is placed by rejection sampling instead of the free-cell index
+SPAWN_ATTEMPTS = 1000 # Random draws before falling back to scanning the whole board
+
+_UNLOADED = object() # Marks a chunk the grid has not asked its loader for yet
 
 class Board:
     """
@@ -10,26 +31,57 @@ class Board:
     tracking the positions of the snake, food, obstacles, and
     enforcing game rules like collision detection.
     """
-    def __init__(self, config_path):
-        with open(config_path, 'r') as f:
-            self.config = json.load(f)
+    def __init__(self, config_path, seed=None):
+        self.level = None # Binary levels (levels.BitmapLevel) keep their obstacles as a bitmap
+        with open(config_path, 'rb') as f:
+            if f.read(len(LEVEL_MAGIC)) == LEVEL_MAGIC:
+                from levels import load_level # NumPy is only needed for binary levels
+                self.level = load_level(config_path)
+                self.config = self.level.config
+            else:
+                f.seek(0)
+                self.config = json.load(f)
+        
+        # Own random generator so a game can be reproduced from its seed
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.seed)
             
         self._validate_config()
         
         self.width = self.config['board_size']['width']
         self.height = self.config['board_size']['height']
         self.cell_size = self.config['cell_size']
-        self.obstacles = list(map(tuple, self.config['initial_obstacles']))
         
-        self.snake = Snake(self.config['initial_snake_position'])
+        # Obstacles are only written into the grid when a chunk is first touched
+        if self.level is not None:
+            self.grid = ChunkedGrid(self.width, self.height, loader=self.level.chunk)
+        else:
+            # Grouped per chunk up front
+            self._obstacle_offsets = {}
+            for ox, oy in self.config['initial_obstacles']:
+                key = (ox >> CHUNK_BITS, oy >> CHUNK_BITS)
+                self._obstacle_offsets.setdefault(key, array('H')).append((oy & CHUNK_MASK) << CHUNK_BITS | (ox & CHUNK_MASK))
+            self.grid = ChunkedGrid(self.width, self.height, loader=self._load_chunk)
+        
+        self.dirty_cells = None # Cells changed since the last frame, tracked only while a view is attached
+        self._food = None
+        
+        self.snake = Snake(self.config['initial_snake_position'], board=self)
         
-        if set(self.snake.body) & set(self.obstacles):
+        if self.grid.get(self.snake.body[0]) == OBSTACLE:
             raise ValueError("Config Error: Initial snake position collides with obstacles.")
         
+        # Index of unoccupied cells, kept up to date by occupy()/release() (too big for huge maps).
+        # The empty level's index is kept so reset() can copy it instead of building it again.
+        self.level_free_cells = self._build_free_cells()
+        self.free_cells = self.level_free_cells and self.level_free_cells.copy()
+        for cell in self.snake.body:
+            self.occupy(cell)
+        
         self.food = self.spawn_food()
         self.score = 0
         
-        self.history = [] # For undo functionality
+        self.history = deque(maxlen=HISTORY_SIZE) # For undo functionality, oldest ticks fall off
         
     def _validate_config(self):
         """Validates the loaded configuration."""
@@ -44,29 +96,121 @@ class Board:
         if not (0 <= start_x < w and 0 <= start_y < h):
             raise ValueError("Config Error: Initial snake position is outside the board boundaries.")
         
-        for obs in self.config['initial_obstacles']:
+        obstacles = self.config['initial_obstacles']
+        if len(obstacles) > VECTORIZE_THRESHOLD:
+            from levels import check_obstacle_bounds
+            check_obstacle_bounds(obstacles, w, h)
+            return
+        
+        for obs in obstacles:
             ox, oy = obs
             if not (0 <= ox < w and 0 <= oy < h):
                 raise ValueError(f"Config Error: Obstacle at position ({ox}, {oy}) is outside the board boundaries.")
         
+    def _build_free_cells(self):
+        """Returns the free-cell index of the empty level, or None on huge maps."""
+        if self.width * self.height > FREE_INDEX_LIMIT:
+            return None
+        if self.level is not None:
+            return FreeCells.from_buffers(self.width, *self.level.free_cell_index())
+        
+        free_cells = FreeCells(self.width, self.height)
+        for cell in self.config['initial_obstacles']:
+            free_cells.remove(cell)
+        return free_cells
+
+    def reset(self, seed=None):
+        """
+        Starts a new game on the same level, without loading the config again.
+
+        The board ends up exactly as a new Board(config_path, seed) would be,
+        so a game depends only on the level and its seed.
+        """
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        
+        snake = self.snake
+        while snake.body:
+            snake.retract_head()
+        snake.direction = snake.next_direction = (1, 0)
+        snake.grow = False
+        
+        # The order of the free-cell index decides where food spawns, so start again from the empty level's
+        self.free_cells = self.level_free_cells and self.level_free_cells.copy()
+        snake.extend_tail(tuple(self.config['initial_snake_position']))
+        
+        self.food = self.spawn_food()
+        self.score = 0
+        self.history.clear()
+
+    def _load_chunk(self, cx, cy):
+        """Grid loader: builds a chunk from the level's obstacles, or None if it has none."""
+        offsets = self._obstacle_offsets.pop((cx, cy), None)
+        if offsets is None:
+            return None
+        
+        data = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        for offset in offsets:
+            data[offset] = OBSTACLE
+        return data
+
+    @property
+    def obstacles(self):
+        """All obstacle cells (loads the whole grid, so avoid it on huge maps)."""
+        return {cell for cell, state in self.grid.cells_in(0, 0, self.width, self.height) if state == OBSTACLE}
+
+    @property
+    def food(self):
+        """Position of the food, or None if the board is full."""
+        return self._food
+
+    @food.setter
+    def food(self, cell):
+        self.mark_dirty(self._food)
+        self._food = cell
+        self.mark_dirty(cell)
+
+    def mark_dirty(self, cell):
+        """Records that a cell needs to be redrawn (if a view is tracking changes)."""
+        if self.dirty_cells is not None and cell is not None:
+            self.dirty_cells.add(cell)
+
     def get_occupied_cells(self):
         """Returns all positions currently occupied by the snake or obstacles."""
-        return set(self.snake.body) | set(self.obstacles)
+        return self.snake.cells | self.obstacles
+
+    def occupy(self, cell):
+        """Marks a cell as taken by the snake."""
+        if self.free_cells is not None:
+            self.free_cells.remove(cell)
+        self.grid.set(cell, SNAKE)
+        self.mark_dirty(cell)
+
+    def release(self, cell):
+        """Marks a cell as free again (e.g. the snake's tail moved away)."""
+        if self.free_cells is not None:
+            self.free_cells.add(cell)
+        self.grid.set(cell, EMPTY)
+        self.mark_dirty(cell)
 
     def spawn_food(self):
         """Places food in a random and unoccupied cell."""
-        occupied = self.get_occupied_cells()
+        if self.free_cells is not None:
+            return self.free_cells.choice(self.rng)
+        
+        # Huge map: sample random cells until one is empty, which is quick while the map is mostly free
+        for _ in range(SPAWN_ATTEMPTS):
+            cell = (self.rng.randrange(self.width), self.rng.randrange(self.height))
+            if self.grid.get(cell) == EMPTY:
+                return cell
         
-        # List of all valid cells (x, y) coordinates
         available_cells = [
-            (x, y) for x in range(self.width) for y in range(self.height)
-            if (x, y) not in occupied
+            (x, y) for y in range(self.height) for x in range(self.width)
+            if self.grid.get((x, y)) == EMPTY
         ]
-
         if not available_cells:
-            return None 
-
-        return random.choice(available_cells)
+            return None
+        return self.rng.choice(available_cells)
 
     def is_valid_move(self, new_head):
         """Checks for collisions with walls, itself, or obstacles."""
@@ -77,45 +221,243 @@ class Board:
             return False
             
         # Obstacle collision
-        if new_head in self.obstacles:
+        if self.grid.get(new_head) == OBSTACLE:
             return False
         
         return True
-    
+
+    def step(self):
+        """
+        Advances the game by one tick: moves the snake and handles eating.
+
+        Returns:
+            True if the move was safe, False if the snake collided.
+        """
+        # Predict the next head position
+        dx, dy = self.snake.next_direction
+        head_x, head_y = self.snake.body[0]
+        new_head = (head_x + dx, head_y + dy)
+
+        # Check for collisions (Wall/Obstacle)
+        if not self.is_valid_move(new_head):
+            return False
+
+        # Move the snake (Self collision)
+        _, success = self.snake.move()
+        if not success:
+            return False
+
+        # Check for Food
+        if self.snake.body[0] == self.food:
+            self.snake.eat()
+            self.food = self.spawn_food()
+            self.score += 10
+
+        return True
+
     def save_state(self):
-        """Saves the current state of the board."""
-        state = {
-            'snake_body': copy.deepcopy(self.snake.body), # We use deepcopy because self.snake.body is a list, otherwise we would be saving a reference
-            'snake_direction': self.snake.direction,
-            'snake_next_direction': self.snake.next_direction,
-            'snake_grow': self.snake.grow,
-            'food': self.food,
-            'score': self.score,
-        }
+        """
+        Saves the current state of the board, before a tick.
+
+        A tick only adds a head and removes at most one tail cell, so instead
+        of copying the body we store its two ends and length alongside the
+        scalar state. That is enough for undo() to reverse the tick.
+        """
+        state = (
+            self.snake.body[0],
+            self.snake.body[-1],
+            len(self.snake.body),
+            self.snake.direction,
+            self.snake.next_direction,
+            self.snake.grow,
+            self.food,
+            self.score,
+        )
         self.history.append(state)
         
-        # Limit history size since we only undo after colliding
-        if len(self.history) > 5:
-            self.history.pop(0)
-        
-    def undo(self):
-        """Reverts the game state to the previous snapshot"""
+    def undo(self, steps=1):
+        """
+        Reverts the game state by up to `steps` ticks.
+
+        Returns:
+            True if at least one tick was undone, False if there is no history.
+        """
         if not self.history:
             return False 
         
-        last_state = self.history.pop()
-        
-        # We restore all variables
-        self.snake.body = last_state['snake_body']
-        self.snake.direction = last_state['snake_direction']
-        self.snake.next_direction = last_state['snake_next_direction']
-        self.snake.grow = last_state['snake_grow']
-        self.food = last_state['food']
-        self.score = last_state['score']
+        for _ in range(min(steps, len(self.history))):
+            head, tail, length, direction, next_direction, grow, food, score = self.history.pop()
+            
+            # Undo the move: drop the new head, then put back the tail if it left
+            if self.snake.body[0] != head:
+                self.snake.retract_head()
+            if len(self.snake.body) < length:
+                self.snake.extend_tail(tail)
+            
+            # We restore all variables
+            self.snake.direction = direction
+            self.snake.next_direction = next_direction
+            self.snake.grow = grow
+            self.food = food
+            self.score = score
         
         return True
             
 
+class ChunkedGrid:
+    """
+    Cell states of a board (EMPTY, OBSTACLE, SNAKE), stored sparsely.
+
+    The board is split into CHUNK_SIZE x CHUNK_SIZE chunks, each a bytearray
+    of cell states in row-major order. A chunk is materialized the first time
+    it is touched: `loader(cx, cy)` supplies its initial contents, or None
+    for a chunk with nothing in it. Empty chunks take no memory until written
+    to, so memory follows what is on the map rather than its size.
+    """
+    def __init__(self, width, height, loader=None):
+        self.width = width
+        self.height = height
+        self.loader = loader
+        # Chunk number (cy * chunk_cols + cx) -> bytearray, None for an empty chunk, or _UNLOADED
+        self.chunk_cols = (width + CHUNK_MASK) >> CHUNK_BITS
+        self.chunks = [_UNLOADED] * (self.chunk_cols * ((height + CHUNK_MASK) >> CHUNK_BITS))
+
+    def chunk(self, cx, cy):
+        """Returns the chunk at chunk coordinates (None if empty), loading it if needed."""
+        index = cy * self.chunk_cols + cx
+        data = self.chunks[index]
+        if data is _UNLOADED:
+            data = self.chunks[index] = self.loader(cx, cy) if self.loader else None
+        return data
+
+    def get(self, cell):
+        """Returns the state of an in-bounds cell."""
+        x, y = cell
+        # Hot path (every collision check): one list lookup once the chunk is loaded
+        data = self.chunks[(y >> CHUNK_BITS) * self.chunk_cols + (x >> CHUNK_BITS)]
+        if data is _UNLOADED:
+            data = self.chunk(x >> CHUNK_BITS, y >> CHUNK_BITS)
+        if data is None:
+            return EMPTY
+        return data[(y & CHUNK_MASK) << CHUNK_BITS | (x & CHUNK_MASK)]
+
+    def set(self, cell, state):
+        """Sets the state of an in-bounds cell."""
+        x, y = cell
+        index = (y >> CHUNK_BITS) * self.chunk_cols + (x >> CHUNK_BITS)
+        data = self.chunks[index]
+        if data is _UNLOADED:
+            data = self.chunk(x >> CHUNK_BITS, y >> CHUNK_BITS)
+        if data is None:
+            if state == EMPTY:
+                return
+            data = self.chunks[index] = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        data[(y & CHUNK_MASK) << CHUNK_BITS | (x & CHUNK_MASK)] = state
+
+    def cells_in(self, x, y, width, height):
+        """Yields ((x, y), state) for every non-empty cell inside a rectangle of the board."""
+        x_end, y_end = min(x + width, self.width), min(y + height, self.height)
+        x, y = max(x, 0), max(y, 0)
+        if x >= x_end or y >= y_end:
+            return
+
+        for cy in range(y >> CHUNK_BITS, ((y_end - 1) >> CHUNK_BITS) + 1):
+            for cx in range(x >> CHUNK_BITS, ((x_end - 1) >> CHUNK_BITS) + 1):
+                data = self.chunk(cx, cy)
+                if data is None:
+                    continue
+
+                # Part of the rectangle covered by this chunk, in board coordinates
+                base_x, base_y = cx << CHUNK_BITS, cy << CHUNK_BITS
+                left, right = max(x, base_x), min(x_end, base_x + CHUNK_SIZE)
+                for row_y in range(max(y, base_y), min(y_end, base_y + CHUNK_SIZE)):
+                    start = (row_y - base_y) << CHUNK_BITS
+                    row = data[start + left - base_x:start + right - base_x]
+                    if not any(row):
+                        continue
+                    for i, state in enumerate(row):
+                        if state:
+                            yield (left + i, row_y), state
+
+
+class FreeCells:
+    """
+    Index of the unoccupied cells of a board.
+
+    Cells are stored as flat indices (y * width + x) in a dense array, with a
+    second array mapping each cell to its slot (-1 when occupied). Removal
+    swaps the last free cell into the vacated slot, so adding, removing and
+    picking a uniformly random free cell are all O(1).
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.cells = array('i', range(width * height))
+        self.slots = array('i', range(width * height))
+        self.size = width * height
+
+    @classmethod
+    def from_buffers(cls, width, cells, slots, size):
+        """Builds the index from precomputed int32 arrays (see levels.BitmapLevel.free_cell_index)."""
+        index = cls.__new__(cls)
+        index.width = width
+        index.cells = array('i')
+        index.cells.frombytes(cells)
+        index.slots = array('i')
+        index.slots.frombytes(slots)
+        index.size = size
+        return index
+
+    def copy(self):
+        """Returns an independent copy of the index (two array copies)."""
+        index = FreeCells.__new__(FreeCells)
+        index.width = self.width
+        index.cells = self.cells[:]
+        index.slots = self.slots[:]
+        index.size = self.size
+        return index
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        x, y = cell
+        return self.slots[y * self.width + x] >= 0
+
+    def add(self, cell):
+        """Marks a cell as free. Does nothing if it already is."""
+        x, y = cell
+        index = y * self.width + x
+        if self.slots[index] >= 0:
+            return
+
+        self.cells[self.size] = index
+        self.slots[index] = self.size
+        self.size += 1
+
+    def remove(self, cell):
+        """Marks a cell as occupied. Does nothing if it already is."""
+        x, y = cell
+        index = y * self.width + x
+        slot = self.slots[index]
+        if slot < 0:
+            return
+
+        # Move the last free cell into the hole
+        self.size -= 1
+        last = self.cells[self.size]
+        self.cells[slot] = last
+        self.slots[last] = slot
+        self.slots[index] = -1
+
+    def choice(self, rng=random):
+        """Returns a uniformly random free cell, or None if there is none."""
+        if not self.size:
+            return None
+
+        index = self.cells[rng.randrange(self.size)]
+        return (index % self.width, index // self.width)
+
+
 class Snake:
     """
     Snake itself.
@@ -123,9 +465,11 @@ class Snake:
     This class maintains the snake's body coordinates, handles movement
     mechanics, manages direction changes, and controls growth when food is eaten.
     """
-    def __init__(self, initial_pos):
-        # Body is a list of (x, y) tuples, where index 0 is the head
-        self.body = [tuple(initial_pos)]
+    def __init__(self, initial_pos, board=None):
+        # Body is a deque of (x, y) tuples, where index 0 is the head
+        self.body = deque([tuple(initial_pos)])
+        self.cells = set(self.body) # Same cells as a set, for O(1) self collision checks
+        self.board = board # Notified of the cells the snake enters and leaves
         # Default direction: Right (1, 0)
         self.direction = (1, 0)
         self.next_direction = (1, 0) # Allows buffered input
@@ -156,24 +500,54 @@ class Snake:
         new_head = (head_x + dx, head_y + dy)
         
         # If we are growing, the tail stays, so we can hit it
-        if self.grow:
-            check_body = self.body
         # If we are NOT growing, the tail will move away, so we can't hit it
-        else:
-            check_body = self.body[:-1]
-        
-        if new_head in check_body:
+        if new_head in self.cells and (self.grow or new_head != self.body[-1]):
              return new_head, False # Collision detected
 
-        self.body.insert(0, new_head)
-        
         if self.grow:
             self.grow = False
         else:
             # Remove the tail if not growing
-            self.body.pop()
+            tail = self.body.pop()
+            self.cells.discard(tail)
+            if self.board is not None:
+                self.board.release(tail)
+
+        self.body.appendleft(new_head)
+        self.cells.add(new_head)
+        if self.board is not None:
+            self.board.occupy(new_head)
             
         return new_head, True 
 
+    def retract_tail(self):
+        """Removes the tail segment (used by the arena, which moves all tails before any head)."""
+        tail = self.body.pop()
+        self.cells.discard(tail)
+        if self.board is not None:
+            self.board.release(tail)
+        return tail
+
+    def extend_head(self, cell):
+        """Adds a new head segment without any collision check (used by the arena)."""
+        self.body.appendleft(cell)
+        self.cells.add(cell)
+        if self.board is not None:
+            self.board.occupy(cell)
+
+    def retract_head(self):
+        """Removes the head segment (used by undo)."""
+        head = self.body.popleft()
+        self.cells.discard(head)
+        if self.board is not None:
+            self.board.release(head)
+
+    def extend_tail(self, cell):
+        """Adds a segment back behind the tail (used by undo)."""
+        self.body.append(cell)
+        self.cells.add(cell)
+        if self.board is not None:
+            self.board.occupy(cell)
+
     def eat(self):
         self.grow = True
\ No newline at end of file
@@ -0,0 +1,169 @@
+import argparse
+import json
+import os
+import queue
+import stat
+import tempfile
+import threading
+import time
+
+LEADERBOARD_SIZE = 10
+HISTORY_SIZE = 1000 # Most recent rounds kept
+
+DEFAULT_SCORE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'highscore.json')
+
+_CLOSE = object() # Tells the writer thread to stop
+
+# Mode a plain open() would give a new file (mkstemp always creates it 0600)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+class ScoreStore:
+    """
+    High score, leaderboard and round history, saved without blocking the game.
+
+    The data lives in memory. record_round() updates it and hands a
+    snapshot to a background writer thread. The writer only keeps the latest
+    pending snapshot and saves it atomically: it writes a temporary file in
+    the same folder, syncs it to disk and renames it over the old one. A
+    crash at any point therefore leaves either the previous file or the new
+    one, never a truncated mix.
+
+    The file stays readable as the original {"high_score": n} format, with
+    "leaderboard" and "history" lists added next to it.
+    """
+    def __init__(self, path=DEFAULT_SCORE_FILE, leaderboard_size=LEADERBOARD_SIZE, history_size=HISTORY_SIZE):
+        self.path = path
+        self.leaderboard_size = leaderboard_size
+        self.history_size = history_size
+        self.session = time.strftime('%Y-%m-%dT%H:%M:%S') # Tells the rounds of different runs apart
+
+        self.high_score = 0
+        self.leaderboard = [] # Best rounds, highest score first
+        self.history = [] # Rounds in the order they were played
+        self._load()
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._write_loop, name='score-writer', daemon=True)
+        self.thread.start()
+
+    def _load(self):
+        """Reads the score file, if there is one (blocking, so only done at startup)."""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            print("Error loading scores, starting a new score file.")
+            return
+
+        self.high_score = data.get('high_score', 0)
+        self.leaderboard = data.get('leaderboard', [])
+        self.history = data.get('history', [])
+
+    def record_round(self, round_num, score, length, seed):
+        """
+        Records the result of a round and schedules a save. Returns immediately.
+
+        Recording the same round again (after an undo) replaces its entry.
+        """
+        entry = {
+            'session': self.session,
+            'round': round_num,
+            'score': score,
+            'length': length,
+            'seed': seed,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        self.history = [e for e in self.history if not self._same_round(e, entry)]
+        self.history.append(entry)
+        self.history = self.history[-self.history_size:]
+
+        board = [e for e in self.leaderboard if not self._same_round(e, entry)] + [entry]
+        board.sort(key=lambda e: e['score'], reverse=True) # Stable: earlier rounds win ties
+        self.leaderboard = board[:self.leaderboard_size]
+
+        self.high_score = max(self.high_score, score)
+        self.queue.put(self.snapshot())
+
+    @staticmethod
+    def _same_round(a, b):
+        return a.get('session') == b['session'] and a.get('round') == b['round']
+
+    def snapshot(self):
+        """The file contents for the current state (entries are never modified, so copying the lists is enough)."""
+        return {'high_score': self.high_score, 'leaderboard': list(self.leaderboard), 'history': list(self.history)}
+
+    def flush(self):
+        """Blocks until every scheduled save has been written."""
+        self.queue.join()
+
+    def close(self):
+        """Writes anything pending and stops the writer thread."""
+        self.queue.put(_CLOSE)
+        self.thread.join()
+
+    def _write_loop(self):
+        while True:
+            items = [self.queue.get()]
+            while True:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Only the newest snapshot matters: skip the ones queued before it
+            snapshots = [item for item in items if item is not _CLOSE]
+            if snapshots:
+                self._write(snapshots[-1])
+            for _ in items:
+                self.queue.task_done()
+            if len(snapshots) < len(items):
+                return
+
+    def _mode(self):
+        """Permissions for the new file: those of the file it replaces, if any."""
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except OSError:
+            return NEW_FILE_MODE
+
+    def _write(self, data):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.scores-', suffix='.tmp')
+        except OSError:
+            print("Error saving high score.")
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fchmod(f.fileno(), self._mode())
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError:
+            print("Error saving high score.")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the saved leaderboard.")
+    parser.add_argument('--file', default=DEFAULT_SCORE_FILE, help="Score file to read")
+    args = parser.parse_args()
+
+    store = ScoreStore(args.file)
+    print(f"High score: {store.high_score}    Rounds recorded: {len(store.history)}")
+    for rank, entry in enumerate(store.leaderboard, 1):
+        print(f"{rank:3}. {entry['score']:6}  length {entry['length']:5}  round {entry['round']:3}  {entry['time']}")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
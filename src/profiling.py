@@ -0,0 +1,148 @@
+import csv
+import io
+import json
+import time
+from collections import deque
+from contextlib import nullcontext
+
+WINDOW_SIZE = 600 # Frames kept for the rolling percentiles
+TRACE_SIZE = 10000 # Frames kept for export
+IDLE_PHASE = 'idle' # Time spent waiting for input or the next tick, left out of the busy time
+
+_DISABLED = nullcontext() # Shared no-op phase, so a disabled profiler allocates nothing
+
+
+class _Phase:
+    """Context manager adding the time spent in its block to one phase of the current frame."""
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + elapsed
+
+
+class FrameProfiler:
+    """
+    Low-overhead timing of the game loop phases.
+
+    Wrap each phase of a frame in `with profiler.phase(name):` and call
+    end_frame() once per loop iteration. While disabled, phase() returns a
+    shared no-op context manager, so the instrumentation costs one attribute
+    check per phase.
+
+    Keeps rolling p50/p99 per phase for the debug overlay, a longer trace
+    that can be exported to JSON or CSV, and can capture a cProfile of the
+    next N frames on demand. The busy time of a frame is the sum of its
+    phases except IDLE_PHASE, which only measures how long the loop slept.
+    """
+    def __init__(self, window=WINDOW_SIZE, trace_size=TRACE_SIZE):
+        self.enabled = False
+        self.phases = [] # Phase names in order of first appearance
+        self.samples = {} # Phase name -> deque of recent per-frame times (ms)
+        self.frame_times = deque(maxlen=window) # Busy time per frame, all phases but idle (ms)
+        self.trace = deque(maxlen=trace_size) # Per-frame dicts for export
+        self.current = {}
+        self.window = window
+        self.frame_count = 0
+
+        self.profile = None
+        self.profile_frames_left = 0
+        self.last_profile_report = None
+
+    def phase(self, name):
+        """Returns a context manager timing one phase of the current frame."""
+        if not self.enabled:
+            return _DISABLED
+        return _Phase(self, name)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.current.clear()
+        return self.enabled
+
+    def end_frame(self):
+        """Closes the current frame: stores its phase times and advances any cProfile capture."""
+        if self.profile is not None:
+            self.profile_frames_left -= 1
+            if self.profile_frames_left <= 0:
+                self._finish_profile()
+
+        if not self.enabled:
+            return
+
+        self.frame_count += 1
+        busy = 0.0
+        for name, elapsed in self.current.items():
+            if name not in self.samples:
+                self.phases.append(name)
+                self.samples[name] = deque(maxlen=self.window)
+            self.samples[name].append(elapsed)
+            if name != IDLE_PHASE:
+                busy += elapsed
+        self.frame_times.append(busy)
+
+        row = dict(self.current)
+        row['frame'] = self.frame_count
+        row['busy'] = busy
+        self.trace.append(row)
+        self.current = {}
+
+    def percentiles(self, name=None):
+        """Returns (p50, p99) in ms for a phase, or for the busy time of whole frames if `name` is None."""
+        samples = self.frame_times if name is None else self.samples.get(name)
+        if not samples:
+            return 0.0, 0.0
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return ordered[last // 2], ordered[last * 99 // 100]
+
+    def summary_lines(self):
+        """Text lines for the debug overlay."""
+        p50, p99 = self.percentiles()
+        lines = [f"busy   p50 {p50:6.2f}  p99 {p99:6.2f} ms"]
+        for name in self.phases:
+            p50, p99 = self.percentiles(name)
+            lines.append(f"{name:6} p50 {p50:6.2f}  p99 {p99:6.2f} ms")
+        if self.profile is not None:
+            lines.append(f"cProfile: {self.profile_frames_left} frames left")
+        return lines
+
+    def export(self, path):
+        """Writes the recorded frames to `path`, as CSV if it ends in .csv and JSON otherwise."""
+        columns = ['frame', 'busy'] + self.phases
+        with open(path, 'w', newline='') as f:
+            if path.endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=columns, restval=0.0)
+                writer.writeheader()
+                writer.writerows(self.trace)
+            else:
+                json.dump({'unit': 'ms', 'phases': self.phases, 'frames': list(self.trace)}, f)
+
+    def start_profile(self, frames, path):
+        """Captures a cProfile of the next `frames` frames and saves it to `path` (.prof) when done."""
+        if self.profile is not None:
+            return False
+        import cProfile # Only loaded when a capture is asked for
+        self.profile = cProfile.Profile()
+        self.profile_frames_left = frames
+        self.profile_path = path
+        self.profile.enable()
+        return True
+
+    def _finish_profile(self):
+        self.profile.disable()
+        self.profile.dump_stats(self.profile_path)
+
+        import pstats
+        report = io.StringIO()
+        pstats.Stats(self.profile, stream=report).sort_stats('cumulative').print_stats(15)
+        self.last_profile_report = report.getvalue()
+        self.profile = None
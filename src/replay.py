@@ -0,0 +1,301 @@
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Board, DIRECTIONS
+
+# File layout: header, then a stream of events
+#   header: magic, format version, board seed (u64), config digest (8 bytes),
+#           final score (u32), number of ticks (u32)
+#   tick run: 0b0LLLLLDD -> run of L+1 ticks (1..32) heading in DIRECTIONS[DD]
+#   undo:     0b10000000 followed by the number of undone ticks as a varint
+MAGIC = b'SNKR'
+VERSION = 1
+HEADER = struct.Struct('<4sBQ8sII')
+
+UNDO_MARKER = 0x80
+MAX_RUN = 32
+
+TICK = 'tick'
+UNDO = 'undo'
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+
+def config_digest(config):
+    """Short fingerprint of a parsed config, used to check a replay is played on the same level."""
+    canonical = json.dumps(config, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(canonical).digest()[:8]
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Replay Error: File is truncated.")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayRecorder:
+    """
+    Records the inputs of one round so it can be re-simulated exactly.
+
+    Call record_tick() for every Board.step() and record_undo() for every
+    Board.undo(). Consecutive ticks with the same heading are run-length
+    encoded, so a straight run costs a single byte.
+    """
+    def __init__(self, board: Board, digest=None):
+        self.seed = board.seed
+        self.digest = digest or config_digest(board.config) # Can be passed on between rounds of the same level
+        self.events = bytearray()
+        self.ticks = 0
+        self.run_direction = None
+        self.run_length = 0
+
+    def record_tick(self, direction):
+        """Records one tick taken with the given (dx, dy) heading."""
+        self.ticks += 1
+        code = DIRECTIONS.index(direction)
+        if code == self.run_direction and self.run_length < MAX_RUN:
+            self.run_length += 1
+            return
+
+        self._flush_run()
+        self.run_direction = code
+        self.run_length = 1
+
+    def record_undo(self, steps):
+        """Records an undo/rewind of `steps` ticks."""
+        self._flush_run()
+        self.events.append(UNDO_MARKER)
+        _write_varint(self.events, steps)
+
+    def to_bytes(self, score):
+        """Returns the complete replay file contents, with the final `score` of the round for verification."""
+        self._flush_run()
+        return HEADER.pack(MAGIC, VERSION, self.seed, self.digest, score, self.ticks) + bytes(self.events)
+
+    def save(self, path, score):
+        """Writes the replay to `path`."""
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes(score))
+
+    def _flush_run(self):
+        if self.run_length:
+            self.events.append((self.run_length - 1) << 2 | self.run_direction)
+        self.run_direction = None
+        self.run_length = 0
+
+
+class Replay:
+    """A decoded replay: the board seed, config digest, recorded result and the list of (kind, value) events."""
+    def __init__(self, seed, digest, events, score, ticks):
+        self.seed = seed
+        self.digest = digest
+        self.events = events # (TICK, direction) per tick or (UNDO, steps)
+        self.score = score # Final score and tick count as recorded
+        self.ticks = ticks
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size:
+            raise ValueError("Replay Error: File is too short.")
+        magic, version, seed, digest, score, ticks = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Replay Error: Not a replay file or unsupported version.")
+
+        pos = HEADER.size
+
+        events = []
+        while pos < len(data):
+            byte = data[pos]
+            pos += 1
+            if byte == UNDO_MARKER:
+                steps, pos = _read_varint(data, pos)
+                events.append((UNDO, steps))
+            else:
+                events.extend([(TICK, DIRECTIONS[byte & 0x03])] * ((byte >> 2) + 1))
+        return cls(seed, digest, events, score, ticks)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def new_board(self, config_path):
+        """Creates the board the replay starts from, checking it uses the recorded level."""
+        board = Board(config_path, seed=self.seed)
+        if config_digest(board.config) != self.digest:
+            raise ValueError("Replay Error: The replay was recorded with a different configuration.")
+        return board
+
+
+def apply_event(board, event):
+    """
+    Applies one replay event to a board, the way main.py does during play.
+
+    Returns:
+        True if the snake is alive afterwards, False if this tick collided.
+    """
+    kind, value = event
+    if kind == UNDO:
+        board.undo(value)
+        return True
+
+    board.snake.next_direction = value # Steered before the state is saved, so undo restores it like in a game
+    board.save_state()
+    return board.step()
+
+
+def verify(replay, config_path=DEFAULT_CONFIG_PATH):
+    """
+    Re-simulates a replay and checks it against the result stored in it.
+
+    Returns:
+        (board, problems): the final board and a list of mismatch descriptions, empty if the replay checks out.
+    """
+    board = simulate(replay, config_path)
+    problems = []
+    if board.score != replay.score:
+        problems.append(f"score {board.score} != recorded {replay.score}")
+    ticks = sum(1 for kind, _ in replay.events if kind == TICK)
+    if ticks != replay.ticks:
+        problems.append(f"{ticks} ticks != recorded {replay.ticks}")
+    return board, problems
+
+
+def simulate(replay, config_path=DEFAULT_CONFIG_PATH):
+    """Re-simulates a whole replay headlessly, as fast as possible, and returns the final board."""
+    board = replay.new_board(config_path)
+    for event in replay.events:
+        apply_event(board, event)
+    return board
+
+
+class ReplayPlayer:
+    """
+    Steps through a replay on a live board, with seeking.
+
+    Seeking forward simulates the events in between; seeking backward
+    re-simulates from the start, which is fast enough headlessly.
+    """
+    def __init__(self, replay, config_path=DEFAULT_CONFIG_PATH):
+        self.replay = replay
+        self.config_path = config_path
+        self.rewind()
+
+    def rewind(self):
+        self.board = self.replay.new_board(self.config_path)
+        self.position = 0 # Index of the next event
+        self.game_over = False
+
+    @property
+    def finished(self):
+        return self.position >= len(self.replay.events)
+
+    def step(self):
+        """Applies the next event. Returns False once the replay is over."""
+        if self.finished:
+            return False
+        self.game_over = not apply_event(self.board, self.replay.events[self.position])
+        self.position += 1
+        return True
+
+    def seek(self, position):
+        """Moves playback to the given event index."""
+        position = max(0, min(position, len(self.replay.events)))
+        if position < self.position:
+            self.rewind()
+        while self.position < position:
+            self.step()
+
+
+def play(replay, config_path, tick_rate):
+    """Plays a replay back in a GameView. Left/Right seek, Space pauses, +/- change speed."""
+    import pygame
+    from view import GameView
+    from timing import FixedTimestep, now_ms
+
+    player = ReplayPlayer(replay, config_path)
+    view = GameView(player.board)
+    timestep = FixedTimestep(tick_rate)
+    paused = False
+    running = True
+
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_LEFT:
+                    player.seek(player.position - 5 * timestep.rate)
+                elif event.key == pygame.K_RIGHT:
+                    player.seek(player.position + 5 * timestep.rate)
+                elif event.key == pygame.K_EQUALS or event.key == pygame.K_PLUS:
+                    timestep.set_rate(timestep.rate * 2)
+                elif event.key == pygame.K_MINUS:
+                    timestep.set_rate(max(timestep.rate // 2, 1))
+                elif event.key == pygame.K_q:
+                    running = False
+
+        if paused or player.finished:
+            timestep.reset(now_ms())
+        else:
+            for _ in range(timestep.advance(now_ms())):
+                player.step()
+
+        view.board = player.board # Changes after seeking backward
+        view.draw_all(game_over=player.game_over, round_num=1)
+        pygame.time.wait(max(1, int(timestep.time_until_next())))
+
+    view.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify or play back recorded Snake games.")
+    parser.add_argument('command', choices=['verify', 'play'])
+    parser.add_argument('replays', nargs='+', help="Replay files (.snkr)")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_PATH, help="Level the replays were recorded on")
+    parser.add_argument('--speed', type=int, default=10, help="Playback ticks per second")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.replays:
+        try:
+            replay = Replay.load(path)
+            if args.command == 'verify':
+                board, problems = verify(replay, args.config)
+                status = "MISMATCH: " + ", ".join(problems) if problems else "ok"
+                print(f"{path}: score {board.score}, length {len(board.snake.body)}, {len(replay.events)} events, {status}")
+                failed = failed or bool(problems)
+            else:
+                play(replay, args.config, args.speed)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+from collections import deque
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Board, FREE_INDEX_LIMIT
+
+KEYFRAME_INTERVAL = 100 # Ticks between full snapshots
+QUEUE_SIZE = 2 * KEYFRAME_INTERVAL + 2 # Messages a subscriber may fall behind before it skips ahead
+WRITE_BUFFER = 4096 # Bytes the transport may hold back before a subscriber counts as slow
+SOCKET_BUFFER = 16384 # Kernel send buffer per subscriber (Linux lets it grow to megabytes otherwise)
+LEVEL_SLICE = 5000 # Obstacles encoded between two yields of the server thread
+
+# Messages are JSON objects, one per line:
+#   {"type": "level", "width", "height", "cell_size", "obstacles"}  when a board starts (obstacles is null on huge maps)
+#   {"type": "keyframe", "t", "body", "food", "score"}              full state, every KEYFRAME_INTERVAL ticks and after undo
+#   {"t", "h", "d"[, "f"][, "s"]}                                    one tick: new head h, tail dropped if d is 1,
+#                                                                    new food f and new score s when they changed
+LEVEL = 0
+KEYFRAME = 1
+DELTA = 2
+
+
+def parse_address(text):
+    """Parses "unix:PATH", "tcp:HOST:PORT" or "PORT" into ('unix', path) or ('tcp', host, port)."""
+    if text.startswith('unix:'):
+        return ('unix', text[5:])
+    if text.startswith('tcp:'):
+        text = text[4:]
+    host, _, port = text.rpartition(':')
+    return ('tcp', host or '127.0.0.1', int(port))
+
+
+def _encode(message):
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+class _Subscriber:
+    __slots__ = ('queue', 'task', 'level', 'skips')
+
+    def __init__(self):
+        self.queue = asyncio.Queue(QUEUE_SIZE) # (kind, data) messages
+        self.level = None # Level message last written to it, not sent again when it skips ahead
+        self.task = asyncio.current_task() # The connection handler, cancelled when the server stops
+        self.skips = 0 # Times it fell too far behind and jumped to the latest keyframe
+
+
+class StreamServer:
+    """
+    Publishes a live game to local spectators over TCP or a Unix socket.
+
+    The server runs an asyncio loop on its own thread. The game thread only
+    calls publish() after each change, which encodes one small message and
+    passes it to that loop. Sending to the subscribers, however many and
+    however slow, never happens on the game thread.
+
+    Each subscriber has a bounded queue. A new subscriber, or one whose
+    queue fills up, gets the level, the latest keyframe and the deltas
+    since then, so a slow consumer skips ahead instead of holding the game
+    back.
+    """
+    def __init__(self, address):
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.subscribers = set()
+
+        # State a new subscriber needs, only touched on the server thread
+        self.inbox = None # (kind, data) from the game thread, in publishing order
+        self.level = None
+        self.keyframe = None
+        self.since_keyframe = []
+
+        # Publisher state, only touched on the game thread
+        self.board = None
+        self.tick = 0
+        self.last_keyframe = 0
+        self.last_head = None
+        self.last_length = 0
+        self.last_food = None
+        self.last_score = None
+
+        self.loop = None
+        self.thread = None
+        self._ready = threading.Event()
+        self._stopped = None
+        self._error = None
+
+    def start(self):
+        """Starts the server thread and waits until it is listening."""
+        self.thread = threading.Thread(target=self._run, name='stream-server', daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def stop(self):
+        """Disconnects the subscribers and stops the server thread."""
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self._stopped.set_result, None)
+            self.thread.join()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        except OSError as e: # Address in use, bad socket path...
+            self._error = e
+            self._ready.set()
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        if self.address[0] == 'unix':
+            server = await asyncio.start_unix_server(self._handle, self.address[1])
+        else:
+            server = await asyncio.start_server(self._handle, self.address[1], self.address[2])
+            self.address = ('tcp',) + server.sockets[0].getsockname()[:2] # Actual port if 0 was asked for
+        self._stopped = self.loop.create_future()
+        self.inbox = asyncio.Queue()
+        dispatcher = asyncio.ensure_future(self._dispatch())
+        self._ready.set()
+
+        async with server:
+            await self._stopped
+            dispatcher.cancel()
+            for subscriber in self.subscribers:
+                subscriber.task.cancel()
+            await asyncio.gather(*(s.task for s in self.subscribers), return_exceptions=True)
+        if self.address[0] == 'unix':
+            os.unlink(self.address[1])
+
+    async def _handle(self, reader, writer):
+        # Keep little in the socket buffers: a slow reader then backs up its queue and skips ahead soon
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER)
+        writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+        subscriber = _Subscriber()
+        self.subscribers.add(subscriber)
+        self._catch_up(subscriber)
+        # Spectators send nothing: notice a hang-up even while the game is paused and nothing is written
+        hangup = asyncio.ensure_future(reader.read())
+        hangup.add_done_callback(lambda _: subscriber.task.cancel())
+        try:
+            while True:
+                kind, data = await subscriber.queue.get()
+                writer.write(data)
+                if kind == LEVEL:
+                    subscriber.level = data
+                await writer.drain()
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            hangup.cancel()
+            writer.close()
+
+    def _catch_up(self, subscriber):
+        """Queues what a subscriber needs to (re)build the current state, dropping anything older."""
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        if self.level is not None and self.level is not subscriber.level:
+            subscriber.queue.put_nowait((LEVEL, self.level))
+        if self.keyframe is not None:
+            subscriber.queue.put_nowait((KEYFRAME, self.keyframe))
+        for data in self.since_keyframe:
+            subscriber.queue.put_nowait((DELTA, data))
+
+    async def _dispatch(self):
+        """Broadcasts what the game thread published, in order, encoding level messages here."""
+        while True:
+            kind, data = await self.inbox.get()
+            if kind == LEVEL:
+                data = await self._encode_level(*data)
+            self._broadcast(kind, data)
+
+    async def _encode_level(self, message, source):
+        """
+        Encodes a level message with its obstacles, taken from `source`.
+
+        `source` is the config's obstacle list or the binary level (never the
+        grid, whose chunks load on the game thread). The list is encoded a
+        slice at a time, letting the game thread run in between.
+        """
+        if source is None:
+            return _encode(dict(message, obstacles=None))
+        if isinstance(source, list):
+            obstacles = source
+        else:
+            ys, xs = source.obstacle_mask().nonzero()
+            obstacles = list(zip(xs.tolist(), ys.tolist()))
+            await asyncio.sleep(0)
+
+        parts = []
+        for start in range(0, len(obstacles), LEVEL_SLICE):
+            parts.append(json.dumps(obstacles[start:start + LEVEL_SLICE], separators=(',', ':'))[1:-1])
+            await asyncio.sleep(0)
+        head = json.dumps(message, separators=(',', ':'))[:-1]
+        return f'{head},"obstacles":[{",".join(parts)}]}}\n'.encode()
+
+    def _broadcast(self, kind, data):
+        """Runs on the server thread: records the message and queues it for every subscriber."""
+        if kind == LEVEL:
+            self.level = data
+            self.keyframe = None
+            self.since_keyframe = []
+        elif kind == KEYFRAME:
+            self.keyframe = data
+            self.since_keyframe = []
+        else:
+            self.since_keyframe.append(data)
+
+        for subscriber in self.subscribers:
+            if subscriber.queue.full():
+                subscriber.skips += 1
+                self._catch_up(subscriber) # Already includes this message
+            else:
+                subscriber.queue.put_nowait((kind, data))
+
+    def _send(self, kind, message):
+        self.loop.call_soon_threadsafe(self.inbox.put_nowait, (kind, _encode(message)))
+
+    def publish(self, board: Board, keyframe=False):
+        """
+        Publishes the board's state (call from the game thread after each tick, undo or new round).
+
+        A single tick goes out as a delta. A new board, any other change to
+        the snake, a forced `keyframe` or the periodic refresh sends a full
+        keyframe instead.
+        """
+        if self.loop is None:
+            return
+        snake = board.snake
+        head, length = snake.body[0], len(snake.body)
+
+        if board is not self.board:
+            self.board = board
+            source = None # Too many cells to list the obstacles of a huge map
+            if board.width * board.height <= FREE_INDEX_LIMIT:
+                source = board.level if board.level is not None else board.config['initial_obstacles']
+            message = {'type': 'level', 'width': board.width, 'height': board.height, 'cell_size': board.cell_size}
+            self.loop.call_soon_threadsafe(self.inbox.put_nowait, (LEVEL, (message, source))) # Encoded on the server thread
+            keyframe = True
+
+        if head == self.last_head and length == self.last_length \
+                and board.food == self.last_food and board.score == self.last_score and not keyframe:
+            return # Nothing changed
+
+        self.tick += 1
+        single_step = (length == 1 or snake.body[1] == self.last_head) \
+            and self.last_length <= length <= self.last_length + 1
+        if keyframe or not single_step or self.tick - self.last_keyframe >= KEYFRAME_INTERVAL:
+            self.last_keyframe = self.tick
+            self._send(KEYFRAME, {
+                'type': 'keyframe',
+                't': self.tick,
+                'body': list(snake.body),
+                'food': board.food,
+                'score': board.score,
+            })
+        else:
+            message = {'t': self.tick, 'h': head, 'd': int(length == self.last_length)}
+            if board.food != self.last_food:
+                message['f'] = board.food
+            if board.score != self.last_score:
+                message['s'] = board.score
+            self._send(DELTA, message)
+
+        self.last_head = head
+        self.last_length = length
+        self.last_food = board.food
+        self.last_score = board.score
+
+
+class Spectator:
+    """Rebuilds the game state from the stream messages (what a consumer of the stream does)."""
+    def __init__(self):
+        self.level = None
+        self.body = deque()
+        self.food = None
+        self.score = 0
+        self.tick = 0
+        self.synced = False # False until the first keyframe after a level
+
+    def apply(self, message):
+        kind = message.get('type')
+        if kind == 'level':
+            self.level = message
+            self.synced = False
+        elif kind == 'keyframe':
+            self.body = deque(tuple(cell) for cell in message['body'])
+            self.food = message['food'] and tuple(message['food'])
+            self.score = message['score']
+            self.tick = message['t']
+            self.synced = True
+        elif self.synced:
+            self.body.appendleft(tuple(message['h']))
+            if message['d']:
+                self.body.pop()
+            if 'f' in message:
+                self.food = message['f'] and tuple(message['f'])
+            self.score = message.get('s', self.score)
+            self.tick = message['t']
+
+
+async def _watch(address):
+    if address[0] == 'unix':
+        reader, _ = await asyncio.open_unix_connection(address[1])
+    else:
+        reader, _ = await asyncio.open_connection(address[1], address[2])
+
+    spectator = Spectator()
+    while line := await reader.readline():
+        spectator.apply(json.loads(line))
+        if spectator.synced and spectator.tick % KEYFRAME_INTERVAL == 0:
+            print(f"tick {spectator.tick}: score {spectator.score}, length {len(spectator.body)}, head {spectator.body[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Follow a game streamed by main.py --stream.")
+    parser.add_argument('address', help="unix:PATH, tcp:HOST:PORT or PORT")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_watch(parse_address(args.address)))
+    except (ConnectionError, OSError) as e:
+        print(e)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
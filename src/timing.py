@@ -0,0 +1,54 @@
+import time
+
+MAX_CATCH_UP_STEPS = 5 # Ticks simulated at most per wake-up before the backlog is dropped
+
+
+def now_ms():
+    """High resolution monotonic clock, in milliseconds."""
+    return time.perf_counter() * 1000
+
+
+class FixedTimestep:
+    """
+    Accumulator-based scheduler for the game simulation.
+
+    Elapsed real time is added to an accumulator and drained in fixed slices
+    of 1000 / rate milliseconds. The simulation therefore advances at exactly
+    `rate` ticks per second on average, however irregularly the game loop
+    wakes up, and independently of how often the screen is redrawn.
+    """
+    def __init__(self, rate, max_steps=MAX_CATCH_UP_STEPS):
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.last_time = None
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """Changes the number of ticks per second."""
+        self.rate = rate
+        self.step_ms = 1000.0 / rate
+
+    def reset(self, now):
+        """Discards accumulated time (e.g. while the game is paused)."""
+        self.last_time = now
+        self.accumulator = 0.0
+
+    def advance(self, now):
+        """Returns how many ticks are due since the previous call."""
+        if self.last_time is None:
+            self.last_time = now
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            # We fell far behind (window dragged, machine suspended): skip ahead instead of fast-forwarding
+            self.accumulator = 0.0
+            return self.max_steps
+
+        self.accumulator -= steps * self.step_ms
+        return steps
+
+    def time_until_next(self):
+        """Milliseconds until the next tick is due."""
+        return max(0.0, self.step_ms - self.accumulator)
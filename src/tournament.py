@@ -0,0 +1,181 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Board, DIRECTIONS, EMPTY, OBSTACLE
+from autopilot import Autopilot
+from arena import WALL, OBSTACLE_HIT, BODY
+
+# Other ways a game can end, next to the causes of death shared with the arena
+MAX_TICKS = 'max-ticks'
+BOARD_FULL = 'board-full'
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+
+class Wanderer:
+    """Baseline bot: keeps its heading and turns at random, or when the next cell is taken."""
+    def __init__(self, board: Board, turn_chance=0.1):
+        self.board = board
+        self.rng = random.Random(board.seed)
+        self.turn_chance = turn_chance
+
+    def decide(self):
+        snake = self.board.snake
+        head_x, head_y = snake.body[0]
+        options = []
+        for dx, dy in DIRECTIONS:
+            cell = (head_x + dx, head_y + dy)
+            if (dx, dy) != (-snake.direction[0], -snake.direction[1]) and self.board.is_valid_move(cell) \
+                    and self.board.grid.get(cell) == EMPTY:
+                options.append((dx, dy))
+        if options and (snake.direction not in options or self.rng.random() < self.turn_chance):
+            return self.rng.choice(options)
+        return snake.direction
+
+
+# Bot name -> factory taking the board. The autopilot builds its distance fields in one go so results are reproducible.
+BOTS = {
+    'autopilot': lambda board: Autopilot(board, field_budget=None),
+    'wander': Wanderer,
+}
+
+
+def death_cause(board):
+    """What the move that Board.step() just refused would have run into."""
+    dx, dy = board.snake.next_direction
+    head_x, head_y = board.snake.body[0]
+    x, y = head_x + dx, head_y + dy
+    if x < 0 or x >= board.width or y < 0 or y >= board.height:
+        return WALL
+    if board.grid.get((x, y)) == OBSTACLE:
+        return OBSTACLE_HIT
+    return BODY
+
+
+def play_game(board, bot, seed, max_ticks):
+    """Plays one headless game on `board` (reset first) and returns its result as a dict."""
+    board.reset(seed)
+    controller = BOTS[bot](board)
+
+    ticks = 0
+    cause = MAX_TICKS
+    while ticks < max_ticks:
+        board.snake.set_direction(controller.decide())
+        if not board.step():
+            cause = death_cause(board)
+            break
+        ticks += 1
+        if board.food is None:
+            cause = BOARD_FULL
+            break
+
+    return {'seed': seed, 'score': board.score, 'length': len(board.snake.body), 'ticks': ticks, 'cause': cause}
+
+
+_boards = {} # Per worker process: config path -> Board, reset between games instead of loading the level again
+
+
+def run_task(task):
+    """Pool worker: plays the game described by (config_path, bot, seed, max_ticks)."""
+    config_path, bot, seed, max_ticks = task
+    board = _boards.get(config_path)
+    if board is None:
+        board = _boards[config_path] = Board(config_path, seed)
+
+    result = play_game(board, bot, seed, max_ticks)
+    result['config'] = config_path
+    result['bot'] = bot
+    return result
+
+
+class Summary:
+    """Aggregates streamed game results per (config, bot)."""
+    def __init__(self):
+        self.groups = {} # (config, bot) -> list of results
+        self.games = 0
+        self.ticks = 0
+
+    def add(self, result):
+        self.groups.setdefault((result['config'], result['bot']), []).append(result)
+        self.games += 1
+        self.ticks += result['ticks']
+
+    def lines(self):
+        lines = []
+        for (config, bot), results in sorted(self.groups.items()):
+            scores = [r['score'] for r in results]
+            causes = Counter(r['cause'] for r in results)
+            lines.append(f"{os.path.basename(config)} / {bot}: {len(results)} games")
+            lines.append(
+                f"  score  mean {statistics.fmean(scores):.1f}  median {statistics.median(scores):.0f}"
+                f"  stdev {statistics.pstdev(scores):.1f}  max {max(scores)}"
+            )
+            lines.append(
+                f"  length mean {statistics.fmean(r['length'] for r in results):.1f}"
+                f"  ticks mean {statistics.fmean(r['ticks'] for r in results):.0f}"
+            )
+            lines.append("  end    " + "  ".join(
+                f"{cause} {count / len(results):.0%}" for cause, count in causes.most_common()
+            ))
+        return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many seeded headless games in parallel and summarize the results.")
+    parser.add_argument('--config', action='append', help="Level to play on (repeat to compare levels)")
+    parser.add_argument('--bot', action='append', choices=sorted(BOTS), help="Bot to play with (repeat to compare bots)")
+    parser.add_argument('--games', type=int, default=100, help="Games per level and bot")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the first game (each level and bot plays the same seeds)")
+    parser.add_argument('--max-ticks', type=int, default=10_000, help="Ticks before a game is stopped")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (default: one per CPU)")
+    parser.add_argument('--output', metavar='FILE', help="Also write every result to FILE as JSON lines")
+    args = parser.parse_args()
+
+    configs = args.config or [DEFAULT_CONFIG_PATH]
+    bots = args.bot or ['autopilot']
+    for config_path in configs:
+        try:
+            Board(config_path) # Report a bad level before starting the workers
+        except (OSError, ValueError) as e:
+            print(f"{config_path}: {e}")
+            sys.exit(1)
+
+    tasks = [
+        (config_path, bot, args.seed + i, args.max_ticks)
+        for config_path in configs for bot in bots for i in range(args.games)
+    ]
+    workers = max(1, args.workers)
+    chunksize = max(1, len(tasks) // (workers * 16)) # Few round trips, but still an even spread at the end
+
+    summary = Summary()
+    output = open(args.output, 'w') if args.output else None
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap_unordered(run_task, tasks, chunksize):
+                summary.add(result)
+                if output:
+                    output.write(json.dumps(result) + '\n')
+                if summary.games % 100 == 0:
+                    print(f"{summary.games}/{len(tasks)} games", end='\r', flush=True)
+    finally:
+        if output:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    print('\n'.join(summary.lines()))
+    print(f"{summary.games} games, {summary.ticks} ticks in {elapsed:.1f} s with {workers} workers"
+          f" ({summary.games / elapsed:.1f} games/s, {summary.ticks / elapsed:.0f} ticks/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
+import numpy as np
 import pygame
-from models import Board, Snake
+from collections import OrderedDict
+from models import Board, Snake, EMPTY, SNAKE, CHUNK_BITS, CHUNK_SIZE
 
 COLOR_BACKGROUND = (0, 0, 0)
 COLOR_HEADER = (40, 40, 40)
@@ -8,6 +10,51 @@ COLOR_FOOD = (255, 0, 0)
 COLOR_OBSTACLE = (128, 128, 128)
 COLOR_WALL = (255, 255, 255)
 COLOR_COLLISION = (255, 0, 255)
+COLOR_GRID = (30, 30, 30)
+COLOR_HEADER_LINE = (100, 100, 100)
+
+MAX_VIEW_WIDTH = 1280 # Largest board area shown at once (pixels), bigger maps scroll
+MAX_VIEW_HEIGHT = 880
+CAMERA_MARGIN = 4 # The camera recenters when the head is within 1/4 of the viewport from its edge
+
+# Extra cell states used when rendering, on top of the grid's EMPTY, OBSTACLE and SNAKE (never stored in the grid)
+HEAD, FOOD = 3, 4
+
+TEXT_CACHE_SIZE = 64 # Rendered strings kept around (score lines, menu, countdown digits)
+
+MENU_OPTIONS = [
+    "[C] - Continue (Next Round)",
+    "[U] - Undo",
+    "[R] - Rewind 5s",
+    "[Q] - Quit Game"
+]
+
+
+class TextCache:
+    """
+    Least-recently-used cache of rendered text surfaces.
+
+    Surfaces are keyed by (font, text, color), so a string is only rendered
+    again when its value actually changes.
+    """
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color):
+        """Returns the antialiased surface for `text`, rendering it only on a cache miss."""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # Evict the least recently used
+        return surface
+
 
 class GameView:
     """
@@ -18,109 +65,338 @@ class GameView:
     the Game Over Menu.
     """
     def __init__(self, board: Board):
-        pygame.init()
+        # Only what the game uses: pygame.init() would also start audio, joysticks, etc.
+        pygame.display.init()
+        pygame.font.init()
         self.board = board
         
         self.header_height = 40
         
-        # Dimensions from JSON config
+        # Dimensions from JSON config, capped to a viewport on big maps
         self.cell_size = board.cell_size
-        self.screen_width = board.width * self.cell_size
-        self.screen_height = (board.height * self.cell_size) + self.header_height
+        self.view_cols = min(board.width, max(1, MAX_VIEW_WIDTH // self.cell_size))
+        self.view_rows = min(board.height, max(1, MAX_VIEW_HEIGHT // self.cell_size))
+        self.screen_width = self.view_cols * self.cell_size
+        self.screen_height = (self.view_rows * self.cell_size) + self.header_height
+        
+        # Top-left board cell shown on screen
+        self.camera_x = 0
+        self.camera_y = 0
         
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption("Python Snake Game")
         self.font = pygame.font.Font(None, 36)
+        self.countdown_font = pygame.font.Font(None, 100)
+        self.text_cache = TextCache()
+
+        # Full repaints map the cell states of the viewport to colors in one go (see draw_board)
+        self.board_rect = pygame.Rect(0, self.header_height, self.screen_width, self.view_rows * self.cell_size)
+        self.cell_surface = pygame.Surface((self.view_cols, self.view_rows)) # One pixel per cell
+        colors = [COLOR_BACKGROUND, COLOR_OBSTACLE, COLOR_SNAKE, COLOR_SNAKE, COLOR_FOOD] # Indexed by state
+        self.palette = np.array([self.cell_surface.map_rgb(color) for color in colors], np.uint32)
+        self.crash_palette = self.palette.copy()
+        self.crash_palette[HEAD] = self.cell_surface.map_rgb(COLOR_COLLISION) # Highlight the head upon collision
+        self.static_palette = self.palette.copy()
+        self.static_palette[[SNAKE, HEAD, FOOD]] = self.palette[EMPTY]
+
+        # Grid lines, drawn once; the background color is transparent
+        self.grid_overlay = pygame.Surface((self.screen_width, self.screen_height))
+        self.grid_overlay.fill(COLOR_BACKGROUND)
+        self.draw_grid(self.grid_overlay)
+        self.grid_overlay.set_colorkey(COLOR_BACKGROUND)
 
-    def draw_cell(self, x, y, color):
-        """Draws a single cell at (x, y) board coordinates."""
-        rect = pygame.Rect(
-            x * self.cell_size, 
-            y * self.cell_size + self.header_height, 
+        # Overlay with transparent background, allocated once
+        self.overlay = pygame.Surface((self.screen_width, self.screen_height))
+        self.overlay.set_alpha(180)
+        self.overlay.fill((0, 0, 0))
+
+        # Retained-mode rendering state
+        self.static_layer = None
+        self.drawn_board = None # Board whose static layer is currently built
+        self.last_frame = None # (game_over, high_score, round_num, freeze_remaining) of the previous frame
+        self.header_text = None
+
+        # Profiling overlay
+        self.debug_font = pygame.font.Font(None, 22)
+        self.debug_lines = None
+        self.debug_surface = None
+        self.debug_rect = None
+
+    def cell_rect(self, x, y):
+        """Returns the screen rectangle of the cell at (x, y) board coordinates."""
+        return pygame.Rect(
+            (x - self.camera_x) * self.cell_size, 
+            (y - self.camera_y) * self.cell_size + self.header_height, 
             self.cell_size, 
             self.cell_size
         )
-        pygame.draw.rect(self.screen, color, rect)
-        
-    def draw_all(self, game_over=False, high_score=0, round_num=1, freeze_remaining=None):
-        """Draws the entire game state."""
-        self.screen.fill(COLOR_BACKGROUND)
-        # Header
-        header_rect = pygame.Rect(0, 0, self.screen_width, self.header_height)
-        pygame.draw.rect(self.screen, COLOR_HEADER, header_rect)
-        pygame.draw.line(self.screen, (100, 100, 100), (0, self.header_height), (self.screen_width, self.header_height), 2)
-        
-        # Score and Round
-        score_text = self.font.render(f"Score: {self.board.score}    Round: {round_num}", True, (255, 255, 255))
-        text_y = (self.header_height - score_text.get_height()) // 2
-        self.screen.blit(score_text, (15, text_y))
-        
-        # Draw Obstacles
-        for obs_x, obs_y in self.board.obstacles:
-            self.draw_cell(obs_x, obs_y, COLOR_OBSTACLE)
 
-        # Draw Food
-        if self.board.food:
-            food_x, food_y = self.board.food
-            self.draw_cell(food_x, food_y, COLOR_FOOD)
+    def in_view(self, cell):
+        """Checks whether a board cell is inside the viewport."""
+        x, y = cell
+        return (self.camera_x <= x < self.camera_x + self.view_cols
+                and self.camera_y <= y < self.camera_y + self.view_rows)
 
-        # Draw Snake
-        for i, (snake_x, snake_y) in enumerate(self.board.snake.body):
-            color = COLOR_SNAKE
-            if game_over and i == 0:
-                # Highlight the head upon collision
-                color = COLOR_COLLISION 
-            self.draw_cell(snake_x, snake_y, color)
+    def follow_head(self):
+        """Scrolls the camera when the snake's head nears the edge of the viewport. Returns True if it moved."""
+        head_x, head_y = self.board.snake.body[0]
+        camera_x = self.scroll(head_x, self.camera_x, self.view_cols, self.board.width)
+        camera_y = self.scroll(head_y, self.camera_y, self.view_rows, self.board.height)
+        if (camera_x, camera_y) == (self.camera_x, self.camera_y):
+            return False
 
-        # Draw Grid Lines
+        self.camera_x, self.camera_y = camera_x, camera_y
+        return True
+
+    @staticmethod
+    def scroll(head, camera, size, limit):
+        """New camera position along one axis: unchanged while the head is well inside, else centered on it."""
+        margin = size // CAMERA_MARGIN
+        if camera + margin <= head < camera + size - margin:
+            return camera
+        return max(0, min(head - size // 2, limit - size))
+
+    def draw_grid(self, surface):
+        """Draws the grid lines over the viewport."""
         for x in range(0, self.screen_width, self.cell_size):
-            pygame.draw.line(self.screen, (30, 30, 30), (x, self.header_height), (x, self.screen_height))
-        for y in range(0, self.board.height * self.cell_size + 1, self.cell_size):
+            pygame.draw.line(surface, COLOR_GRID, (x, self.header_height), (x, self.screen_height))
+        for y in range(0, self.view_rows * self.cell_size + 1, self.cell_size):
             draw_y = y + self.header_height
-            pygame.draw.line(self.screen, (30, 30, 30), (0, draw_y), (self.screen_width, draw_y))
+            pygame.draw.line(surface, COLOR_GRID, (0, draw_y), (self.screen_width, draw_y))
+
+    def viewport_states(self):
+        """
+        Returns the cell states inside the viewport as a (rows, cols) uint8 array.
+
+        Rows are copied straight out of the grid chunks (only the chunks
+        inside the viewport are visited), with the food and the snake's head
+        marked as FOOD and HEAD.
+        """
+        left, top = self.camera_x, self.camera_y
+        right, bottom = left + self.view_cols, top + self.view_rows
+        states = np.zeros((self.view_rows, self.view_cols), np.uint8)
+
+        for cy in range(top >> CHUNK_BITS, ((bottom - 1) >> CHUNK_BITS) + 1):
+            for cx in range(left >> CHUNK_BITS, ((right - 1) >> CHUNK_BITS) + 1):
+                data = self.board.grid.chunk(cx, cy)
+                if data is None:
+                    continue
+                chunk = np.frombuffer(data, np.uint8).reshape(CHUNK_SIZE, CHUNK_SIZE) # A view, nothing copied yet
+
+                # Part of the viewport covered by this chunk, in board coordinates
+                base_x, base_y = cx << CHUNK_BITS, cy << CHUNK_BITS
+                x0, x1 = max(left, base_x), min(right, base_x + CHUNK_SIZE)
+                y0, y1 = max(top, base_y), min(bottom, base_y + CHUNK_SIZE)
+                states[y0 - top:y1 - top, x0 - left:x1 - left] = chunk[y0 - base_y:y1 - base_y, x0 - base_x:x1 - base_x]
+
+        for cell, state in ((self.board.food, FOOD), (self.board.snake.body[0], HEAD)):
+            if cell and self.in_view(cell):
+                states[cell[1] - top, cell[0] - left] = state
+        return states
+
+    def draw_board(self, surface, palette):
+        """
+        Paints every cell of the viewport onto `surface`, then the grid lines.
+
+        The states are turned into pixel values with one palette lookup and
+        written into a surface of one pixel per cell, which is scaled up to
+        the cell size straight onto `surface`. The cost does not depend on how
+        many cells are filled.
+        """
+        pixels = palette[self.viewport_states()]
+        pygame.surfarray.blit_array(self.cell_surface, pixels.T) # surfarray indexes pixels as [x, y]
+        pygame.transform.scale(self.cell_surface, self.board_rect.size, surface.subsurface(self.board_rect))
+        surface.blit(self.grid_overlay, (0, 0))
+
+    def build_static_layer(self):
+        """Pre-renders what stays fixed while the camera does not move: background, header chrome, obstacles and grid."""
+        layer = pygame.Surface((self.screen_width, self.screen_height))
+        layer.fill(COLOR_BACKGROUND)
+
+        # Header
+        header_rect = pygame.Rect(0, 0, self.screen_width, self.header_height)
+        pygame.draw.rect(layer, COLOR_HEADER, header_rect)
+        line_y = self.header_height - 2 # Both rows of the line inside the header, the board is painted right below
+        pygame.draw.line(layer, COLOR_HEADER_LINE, (0, line_y), (self.screen_width, line_y), 2)
+
+        # Obstacles and grid (the snake and the food are left out)
+        self.draw_board(layer, self.static_palette)
+        return layer
+
+    def draw_all(self, game_over=False, high_score=0, round_num=1, freeze_remaining=None, debug_lines=None):
+        """
+        Draws the game state.
+
+        The whole screen is only repainted when a new board is shown or an
+        overlay (Game Over menu, countdown) changes. Otherwise only the cells
+        the board reported as changed, plus the header when the score moves,
+        are redrawn and pushed with display.update().
+
+        `debug_lines` (from profiling.FrameProfiler) are shown in a box at the
+        top right of the board when given.
+        """
+        if debug_lines is not None:
+            debug_lines = tuple(debug_lines)
+        frame = (game_over, high_score, round_num, freeze_remaining, debug_lines)
+        last_frame = self.last_frame
+        self.last_frame = frame
+
+        camera_moved = self.follow_head()
+        if self.board is not self.drawn_board or camera_moved:
+            # New round or scrolled: start tracking the changes of the new board and rebuild the static layer
+            self.drawn_board = self.board
+            self.board.dirty_cells = set()
+            self.static_layer = self.build_static_layer()
+            self.redraw_full(*frame)
+            return
+
+        has_overlay = game_over or freeze_remaining is not None
+        had_overlay = last_frame[0] or last_frame[3] is not None
+        if has_overlay or had_overlay:
+            # Overlays cover the board, so repaint everything, but only when something changed
+            if frame != last_frame or self.board.dirty_cells:
+                self.redraw_full(*frame)
+            return
+
+        rects = [self.redraw_cell(cell) for cell in self.board.dirty_cells if self.in_view(cell)]
+        self.board.dirty_cells.clear()
+
+        header_rect = self.draw_header(round_num)
+        if header_rect:
+            rects.append(header_rect)
+
+        if debug_lines is not None:
+            # Cells under the box may have just been repainted, so rebuild the area and draw the box again
+            rects.append(self.draw_debug_overlay(debug_lines, restore=True))
+
+        if rects:
+            pygame.display.update(rects)
+
+    def redraw_full(self, game_over, high_score, round_num, freeze_remaining, debug_lines):
+        """Repaints the whole screen from the static layer."""
+        self.screen.blit(self.static_layer, (0, 0))
+        self.board.dirty_cells.clear()
+
+        # Score and Round
+        self.header_text = None
+        self.draw_header(round_num)
+
+        # Food, snake and obstacles, with the grid lines over them
+        self.draw_board(self.screen, self.crash_palette if game_over else self.palette)
+
         # Game Over Menu
         if game_over:
             # overlay cu fundal transparent
-            overlay = pygame.Surface((self.screen_width, self.screen_height))
-            overlay.set_alpha(180)
-            overlay.fill((0, 0, 0))
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.overlay, (0, 0))
             
             # Display Game Over Text
-            text = self.font.render("GAME OVER", True, COLOR_COLLISION)
+            text = self.text_cache.render(self.font, "GAME OVER", COLOR_COLLISION)
             text_rect = text.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 60))
             self.screen.blit(text, text_rect)
             
             # Session Statistics 
-            stats_text = self.font.render(f"Round: {round_num} | High Score: {high_score}", True, (255, 255, 255))
+            stats_text = self.text_cache.render(self.font, f"Round: {round_num} | High Score: {high_score}", (255, 255, 255))
             stats_rect = stats_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2 - 20))
             self.screen.blit(stats_text, stats_rect)
             
             # Menu Instructions
-            options = [
-                "[C] - Continue (Next Round)",
-                "[U] - Undo",
-                "[Q] - Quit Game"
-            ]
-            
             start_y = self.screen_height // 2 + 20
-            for i, line in enumerate(options):
-                menu_surf = self.font.render(line, True, (200, 200, 200))
+            for i, line in enumerate(MENU_OPTIONS):
+                menu_surf = self.text_cache.render(self.font, line, (200, 200, 200))
                 menu_rect = menu_surf.get_rect(center=(self.screen_width // 2, start_y + i * 30))
                 self.screen.blit(menu_surf, menu_rect)
             
         # Freeze countdown
         if freeze_remaining is not None:
-            font = pygame.font.Font(None, 100)
-            text = font.render(str(freeze_remaining), True, (255, 255, 0))
+            text = self.text_cache.render(self.countdown_font, str(freeze_remaining), (255, 255, 0))
             
-            text_shadow = font.render(str(freeze_remaining), True, (0, 0, 0))
+            text_shadow = self.text_cache.render(self.countdown_font, str(freeze_remaining), (0, 0, 0))
             center_x, center_y = self.screen_width // 2, self.screen_height // 2
             self.screen.blit(text_shadow, (center_x - 2, center_y - 2 + 20))
             self.screen.blit(text, (center_x, center_y + 20))
+        
+        if debug_lines is not None:
+            self.draw_debug_overlay(debug_lines)
             
         pygame.display.flip()
 
+    def redraw_cell(self, cell):
+        """Repaints one cell with whatever occupies it now and returns its screen rectangle."""
+        rect = self.cell_rect(*cell)
+        if cell in self.board.snake.cells:
+            color = COLOR_SNAKE
+        elif cell == self.board.food:
+            color = COLOR_FOOD
+        else:
+            # Empty again: restore the background (and grid) from the static layer
+            self.screen.blit(self.static_layer, rect, rect)
+            return rect
+
+        pygame.draw.rect(self.screen, color, rect)
+        pygame.draw.line(self.screen, COLOR_GRID, rect.topleft, rect.bottomleft)
+        pygame.draw.line(self.screen, COLOR_GRID, rect.topleft, rect.topright)
+        return rect
+
+    def draw_header(self, round_num):
+        """Redraws the score line if it changed. Returns the header rectangle, or None if nothing was drawn."""
+        text = f"Score: {self.board.score}    Round: {round_num}"
+        if text == self.header_text:
+            return None
+        self.header_text = text
+
+        header_rect = pygame.Rect(0, 0, self.screen_width, self.header_height)
+        self.screen.blit(self.static_layer, header_rect, header_rect)
+
+        score_text = self.text_cache.render(self.font, text, (255, 255, 255))
+        text_y = (self.header_height - score_text.get_height()) // 2
+        self.screen.blit(score_text, (15, text_y))
+        return header_rect
+
+    def draw_debug_overlay(self, lines, restore=False):
+        """
+        Draws the profiling overlay and returns its screen rectangle.
+
+        With `restore`, the board content under the previous box is redrawn
+        first, so a shrinking box leaves nothing behind.
+        """
+        if lines != self.debug_lines:
+            self.debug_lines = lines
+            surfaces = [self.debug_font.render(line, True, (255, 255, 0)) for line in lines]
+            width = max(surf.get_width() for surf in surfaces) + 10
+            height = sum(surf.get_height() for surf in surfaces) + 10
+            self.debug_surface = pygame.Surface((width, height))
+            self.debug_surface.set_alpha(200)
+            y = 5
+            for surf in surfaces:
+                self.debug_surface.blit(surf, (5, y))
+                y += surf.get_height()
+
+        rect = self.debug_surface.get_rect(topright=(self.screen_width - 5, self.header_height + 5))
+        dirty = rect.union(self.debug_rect) if restore and self.debug_rect else rect
+        if restore:
+            self.redraw_region(dirty)
+        self.screen.blit(self.debug_surface, rect)
+        self.debug_rect = rect
+        return dirty
+
+    def redraw_region(self, rect):
+        """Repaints the board inside a screen rectangle from the static layer and the current cells."""
+        rect = rect.clip(self.screen.get_rect())
+        self.screen.blit(self.static_layer, rect, rect)
+        first_x = self.camera_x + rect.left // self.cell_size
+        last_x = self.camera_x + (rect.right - 1) // self.cell_size
+        first_y = self.camera_y + max(0, (rect.top - self.header_height) // self.cell_size)
+        last_y = self.camera_y + (rect.bottom - 1 - self.header_height) // self.cell_size
+        for y in range(first_y, last_y + 1):
+            for x in range(first_x, last_x + 1):
+                cell = (x, y)
+                if cell in self.board.snake.cells or cell == self.board.food:
+                    self.redraw_cell(cell)
+
+    def invalidate(self):
+        """Forces a full repaint on the next frame (e.g. after the window was uncovered)."""
+        self.drawn_board = None
+
     def cleanup(self):
         """Closes Pygame."""
         pygame.quit()
\ No newline at end of file
@@ -0,0 +1,128 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from models import Board, EMPTY, SNAKE
+from arena import Arena, FOOD_REWARD, HEAD_ON, BODY, WALL, OBSTACLE_HIT
+
+RIGHT, LEFT, UP, DOWN = (1, 0), (-1, 0), (0, -1), (0, 1)
+
+
+@pytest.fixture
+def arena(tmp_path):
+    """A two-snake arena on an empty 10x10 board, without food."""
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps({
+        'board_size': {'width': 10, 'height': 10},
+        'cell_size': 10,
+        'initial_snake_position': [1, 1],
+        'initial_obstacles': [[9, 9]],
+    }))
+    return Arena(Board(str(path), seed=0), 2, food_count=0)
+
+
+def place(snake, cells, direction):
+    """Replaces a snake's body with `cells` (head first) heading in `direction`."""
+    while snake.body:
+        snake.retract_tail()
+    for cell in reversed(cells):
+        snake.extend_head(cell)
+    snake.direction = snake.next_direction = direction
+
+
+def test_heads_entering_the_same_cell_both_die(arena):
+    a, b = arena.snakes
+    place(a, [(3, 5), (2, 5)], RIGHT)
+    place(b, [(5, 5), (6, 5)], LEFT)
+
+    assert sorted(arena.step()) == [0, 1]
+    assert arena.causes == [HEAD_ON, HEAD_ON]
+    assert arena.living == []
+    assert arena.board.grid.get((4, 5)) == EMPTY # Nobody moved in, and the bodies are cleared
+    assert arena.board.grid.get((3, 5)) == EMPTY
+
+
+def test_heads_cannot_swap_cells(arena):
+    a, b = arena.snakes
+    place(a, [(4, 5), (3, 5)], RIGHT)
+    place(b, [(5, 5), (6, 5)], LEFT)
+
+    assert sorted(arena.step()) == [0, 1]
+    assert arena.causes == [HEAD_ON, HEAD_ON]
+
+
+def test_a_head_may_follow_a_moving_tail(arena):
+    a, b = arena.snakes
+    place(a, [(3, 4), (2, 4)], RIGHT) # Enters b's tail as it leaves
+    place(b, [(4, 3), (4, 4)], UP)
+
+    assert arena.step() == []
+    assert list(a.body) == [(4, 4), (3, 4)]
+    assert list(b.body) == [(4, 2), (4, 3)]
+    assert arena.board.grid.get((4, 4)) == SNAKE
+
+
+def test_a_snake_may_follow_its_own_tail(arena):
+    a, b = arena.snakes
+    place(a, [(2, 2), (3, 2), (3, 3), (2, 3)], DOWN) # A closed square: the head moves into the tail
+    place(b, [(7, 7)], LEFT)
+
+    assert arena.step() == []
+    assert list(a.body) == [(2, 3), (2, 2), (3, 2), (3, 3)]
+
+
+def test_a_growing_tail_blocks_the_cell(arena):
+    a, b = arena.snakes
+    place(a, [(3, 4), (2, 4)], RIGHT)
+    place(b, [(4, 3), (4, 4)], UP)
+    b.eat()
+
+    assert arena.step() == [0]
+    assert arena.causes == [BODY, None]
+    assert list(b.body) == [(4, 2), (4, 3), (4, 4)]
+
+
+def test_contested_food_is_not_eaten(arena):
+    a, b = arena.snakes
+    place(a, [(3, 5), (2, 5)], RIGHT)
+    place(b, [(5, 5), (6, 5)], LEFT)
+    arena.food = {(4, 5)}
+
+    arena.step()
+    assert arena.food == {(4, 5)}
+    assert arena.scores == [0, 0]
+
+
+def test_eating_scores_and_grows(arena):
+    a, b = arena.snakes
+    place(a, [(3, 5), (2, 5)], RIGHT)
+    place(b, [(7, 7)], LEFT)
+    arena.food = {(4, 5)}
+
+    assert arena.step() == []
+    assert arena.scores == [FOOD_REWARD, 0]
+    assert len(arena.food) == 1 and (4, 5) not in arena.food # Replaced elsewhere
+    arena.step()
+    assert list(a.body) == [(5, 5), (4, 5), (3, 5)]
+
+
+def test_walls_and_obstacles_kill(arena):
+    a, b = arena.snakes
+    place(a, [(0, 5)], LEFT)
+    place(b, [(8, 9)], RIGHT)
+
+    assert sorted(arena.step()) == [0, 1]
+    assert arena.causes == [WALL, OBSTACLE_HIT]
+
+
+def test_the_outcome_does_not_depend_on_the_order_of_the_snakes(arena):
+    a, b = arena.snakes
+    place(a, [(4, 3), (4, 4)], UP)
+    place(b, [(3, 4), (2, 4)], RIGHT) # b now moves into a's leaving tail, after a in the order
+
+    assert arena.step() == []
+    assert list(b.body) == [(4, 4), (3, 4)]
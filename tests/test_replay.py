@@ -0,0 +1,102 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from models import Board, DIRECTIONS
+from replay import HEADER, Replay, ReplayRecorder, TICK, UNDO, simulate, verify
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.json')
+
+
+def state(board):
+    snake = board.snake
+    return (list(snake.body), snake.direction, snake.next_direction, snake.grow, board.food, board.score)
+
+
+def play(board, recorder, ticks, rng):
+    """Plays random moves the way main.py does, undoing a few ticks after every crash."""
+    for _ in range(ticks):
+        if rng.random() < 0.2:
+            board.snake.set_direction(rng.choice(DIRECTIONS))
+        board.save_state()
+        recorder.record_tick(board.snake.next_direction)
+        if not board.step():
+            steps = rng.choice([1, 5, 50])
+            board.undo(steps)
+            recorder.record_undo(steps)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_replay_round_trip(seed):
+    board = Board(CONFIG_PATH, seed=seed)
+    recorder = ReplayRecorder(board)
+    play(board, recorder, 500, random.Random(seed))
+
+    replay = Replay.from_bytes(recorder.to_bytes(board.score))
+    assert replay.seed == seed
+    assert replay.ticks == sum(1 for kind, _ in replay.events if kind == TICK)
+    assert state(simulate(replay, CONFIG_PATH)) == state(board)
+
+    final, problems = verify(replay, CONFIG_PATH)
+    assert problems == []
+    assert final.score == board.score
+
+
+def test_verify_reports_a_wrong_score():
+    board = Board(CONFIG_PATH, seed=1)
+    recorder = ReplayRecorder(board)
+    play(board, recorder, 100, random.Random(1))
+
+    _, problems = verify(Replay.from_bytes(recorder.to_bytes(board.score + 10)), CONFIG_PATH)
+    assert problems
+
+
+def test_truncated_replays_raise_value_error():
+    board = Board(CONFIG_PATH, seed=2)
+    recorder = ReplayRecorder(board)
+    board.save_state()
+    recorder.record_tick(board.snake.next_direction)
+    board.step()
+    recorder.record_undo(1000) # A two-byte varint
+    data = recorder.to_bytes(board.score)
+    assert Replay.from_bytes(data).events[-1] == (UNDO, 1000)
+
+    # Cut inside the header, or inside the undo count
+    for size in list(range(HEADER.size)) + [len(data) - 1, len(data) - 2]:
+        with pytest.raises(ValueError):
+            Replay.from_bytes(data[:size])
+
+
+def test_reset_matches_a_new_board():
+    board = Board(CONFIG_PATH, seed=3)
+    play(board, ReplayRecorder(board), 300, random.Random(3))
+
+    board.reset(7)
+    fresh = Board(CONFIG_PATH, seed=7)
+    assert state(board) == state(fresh)
+    assert len(board.free_cells) == len(fresh.free_cells)
+    assert not board.history
+    assert [board.spawn_food() for _ in range(20)] == [fresh.spawn_food() for _ in range(20)]
+
+
+def test_undo_restores_every_tick():
+    board = Board(CONFIG_PATH, seed=4)
+    rng = random.Random(4)
+    states = []
+    for _ in range(200):
+        if rng.random() < 0.2:
+            board.snake.set_direction(rng.choice(DIRECTIONS))
+        states.append(state(board))
+        board.save_state()
+        if not board.step():
+            board.undo()
+            states.pop()
+
+    while states:
+        assert board.undo()
+        assert state(board) == states.pop()
+    assert not board.undo()